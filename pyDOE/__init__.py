@@ -25,8 +25,13 @@ __version__ = '0.3.8'
 from pyDOE.doe_box_behnken import *
 from pyDOE.doe_composite import *
 from pyDOE.doe_factorial import *
+from pyDOE.doe_alias import *
 from pyDOE.doe_lhs import *
 from pyDOE.doe_fold import *
 from pyDOE.doe_plackett_burman import *
+from pyDOE.doe_hadamard import *
+from pyDOE.doe_packed import *
+from pyDOE.build_regression_matrix import *
 from pyDOE.var_regression_matrix import *
+from pyDOE.random_state import *
     
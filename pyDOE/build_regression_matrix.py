@@ -13,85 +13,355 @@ Much thanks goes to these individuals. It has been converted to Python by
 Abraham Lee.
 """
 
+import re
 import numpy as np
+from functools import lru_cache
+from itertools import combinations, combinations_with_replacement
+from pyDOE.output import check_out
 
-def grep(haystack, needle):
-    start = 0
-    while True:
-        start = haystack.find(needle, start)
-        if start==-1:
-            return
-        yield start
-        start += len(needle)
+__all__ = ['build_regression_matrix', 'compile_model', 'RegressionModel']
 
-def build_regression_matrix(H, model, build=None):
+_FACTOR = re.compile(r'x(\d+)(?:\^(\d+))?$')
+
+def build_regression_matrix(H, model, build=None, out=None):
     """
     Build a regression matrix using a DOE matrix and a list of monomials.
     
     Parameters
     ----------
     H : 2d-array
+        The design matrix, one row per point and one column per variable. A
+        single row or column is taken as one point (the "vector mode").
     model : str
+        A string of tokens that define the regression model (e.g. 
+        '1 x0 x1 x0*x1 x0**2'), a list of such tokens, one of the model
+        names of ``compile_model`` ('linear', 'interaction', 'quadratic' or
+        'cubic', for all the columns of ``H``), or a model returned by
+        ``compile_model``.
+    
+    Optional
+    --------
     build : bool-array
+        Which terms of the model to include (Default: all of them).
+    out : array or str
+        An array to write the regression matrix into, or the name of a
+        ``.npy`` file to create (see ``pyDOE.output``).
     
     Returns
     -------
     R : 2d-array
+        The regression matrix, with one row per point of ``H`` and one
+        column per term of the model. In vector mode, a single column with
+        one row per term.
     
-    """
-    ListOfTokens = model.split(' ')
-    if H.shape[1]==1:
-        size_index = len(str(H.shape[0]))
-    else:
-        size_index = len(str(H.shape[1]))
+    Notes
+    -----
+    The variables are numbered from 0 as x0, x1, ..., possibly with leading
+    zeros (x00, x01, ...). The model is compiled only once, so building
+    regression matrices of many designs with the same model only costs the
+    vectorized column products.
     
-    if build is None:
-        build = [True]*len(ListOfTokens)
+    Example
+    -------
+    ::
+    
+        >>> build_regression_matrix([[1, 2], [3, 4]], '1 x0 x1 x0*x1 x1**2')
+        array([[ 1.,  1.,  2.,  2.,  4.],
+               [ 1.,  3.,  4., 12., 16.]])
+    
+    """
+    H = np.atleast_2d(H)
     
     # Test if the vector has the wrong direction (lines instead of columns)
     if H.shape[0]==1:
         H = H.T
     
-    # Collect the list of monomials
-    Monom_Index = []
-    for i in range(len(ListOfTokens)):
-        if build[i]:
-            Monom_Index += [grep(ListOfTokens, 'x' + str(0)*(size_index - \
-            len(str(i))) + str(i))]
-    
-    Monom_Index = -np.sort(-Monom_Index)
-    Monom_Index = np.unique(Monom_Index)
+    if not isinstance(model, RegressionModel):
+        nvars = H.shape[0] if H.shape[1]==1 else H.shape[1]
+        model = compile_model(model, n=nvars if model in _MODELS else None)
+    if build is not None:
+        build = np.asarray(build, dtype=bool)
+        model = RegressionModel(model.exponents[build],
+                                [t for t, b in zip(model.terms, build) if b])
     
     if H.shape[1]==1:
-        nb_var = H.shape[0]  # vector "mode": the number of vars is equal to the number of lines of H
-        VectorMode = True
+        # Vector "mode": the number of vars is equal to the number of lines
+        # of H
+        R = model.build(H.T).T
+        if out is not None:
+            out = check_out(out, R.shape)
+            out[...] = R
+            R = out
+        return R
+    
+    # Matrix "mode": the number of vars is equal to the number of columns of H
+    return model.build(H, out=out)
+
+################################################################################
+
+class RegressionModel(object):
+    """
+    A compiled regression model
+    
+    Parameters
+    ----------
+    exponents : 2d-array
+        The exponent of every variable (column) in every term (row), e.g.
+        ``[[0, 0], [1, 0], [1, 1]]`` for '1 x0 x0*x1'.
+    
+    Optional
+    --------
+    terms : list
+        The names of the terms (Default: built from ``exponents``).
+    
+    Example
+    -------
+    ::
+    
+        >>> model = compile_model('1 x0 x1 x0*x1')
+        >>> model.exponents
+        array([[0, 0],
+               [1, 0],
+               [0, 1],
+               [1, 1]])
+        >>> model.build(ff2n(2))
+        array([[ 1., -1., -1.,  1.],
+               [ 1.,  1., -1., -1.],
+               [ 1., -1.,  1., -1.],
+               [ 1.,  1.,  1.,  1.]])
+    
+    """
+    def __init__(self, exponents, terms=None):
+        exponents = np.array(exponents, dtype=np.intp, ndmin=2)
+        assert exponents.ndim==2, 'The exponents must be a 2d-array.'
+        assert np.all(exponents>=0), 'The exponents must be non-negative.'
+        exponents.flags.writeable = False
+        self.exponents = exponents
+        if terms is None:
+            terms = [_term(e) for e in exponents]
+        assert len(terms)==len(exponents), 'Expected one name per term.'
+        self.terms = list(terms)
+        
+        self._plan()
+    
+    def _plan(self):
+        """
+        Plan the products that build the terms
+        
+        Every term of degree d>1 is the product of a term of degree d - 1
+        (its "parent", without one factor of its last variable) with a
+        column of the design. Parents that are terms of the model are taken
+        from the regression matrix, other ones are kept in a scratch array,
+        so that every product (e.g. x0*x1 in x0*x1*x2 and x0*x1*x3) is
+        computed only once.
+        """
+        index = {}
+        for t, e in enumerate(self.exponents):
+            index.setdefault(tuple(e), t)
+        scratch = {}
+        steps = []  # (destination, parent, variable)
+        
+        def ref(e):
+            if e in index and index[e] in done:
+                return ('R', index[e])
+            if sum(e)==1:
+                return ('H', e.index(1))
+            if e not in scratch:
+                parent, j = _parent(e)
+                src = ref(parent)
+                scratch[e] = len(scratch)
+                steps.append((('S', scratch[e]), src, j))
+            return ('S', scratch[e])
+        
+        done = set()
+        for t in np.argsort(self.exponents.sum(axis=1), kind='stable'):
+            e = tuple(int(p) for p in self.exponents[t])
+            if sum(e)==0:
+                steps.append((('R', t), None, None))
+            elif sum(e)==1:
+                steps.append((('R', t), ('H', e.index(1)), None))
+            else:
+                parent, j = _parent(e)
+                steps.append((('R', t), ref(parent), j))
+            done.add(t)
+        
+        self._steps = steps
+        self._nscratch = len(scratch)
+    
+    @property
+    def nvars(self):
+        """
+        The number of variables the model uses
+        """
+        return self.exponents.shape[1]
+    
+    def __len__(self):
+        return len(self.terms)
+    
+    def __repr__(self):
+        return 'RegressionModel({!r})'.format(' '.join(self.terms))
+    
+    def build(self, H, out=None):
+        """
+        The regression matrix of a design, one row per point
+        
+        Parameters
+        ----------
+        H : 2d-array
+            The design matrix, with at least ``nvars`` columns.
         
-        for i in range(nb_var):
-            for j in range(ListOfTokens.shape[0]):
-                ListOfTokens[j] = ListOfTokens[j].replace(
-                    'x' + str(0)*(size_index - len(str(i))) + str(i),
-                    'H(' + str(i) + ')')
-    else:
-        nb_var = H.shape[0]  # matrix "mode": the number of vars is equal to the number of columns of H
-        VectorMode = False
+        Optional
+        --------
+        out : array or str
+            An array to write the regression matrix into, or the name of a
+            ``.npy`` file to create (see ``pyDOE.output``).
         
-        for i in range(nb_var):
-            for j in range(ListOfTokens.shape[0]):
-                ListOfTokens[j] = ListOfTokens[j].replace(
-                    'x' + str(0)*(size_index - len(str(i))) + str(i),
-                    'H[i,' + str(i) + ')')
-    
-    # Now build the regression matrix
-    if VectorMode:
-        R = np.zeros((len(ListOfTokens), 1))
-        for j in range(len(ListOfTokens)):
-            R[j, 0] = eval(ListOfTokens[j])
-    else:
-        R = np.zeros((H.shape[0], len(ListOfTokens)))
-        for i in range(H.shape[0]):
-            for j in range(len(ListOfTokens)):
-                R[i, j] = eval(ListOfTokens[j])
-    
-    return R
+        Returns
+        -------
+        R : 2d-array
+            The m-by-len(model) regression matrix, in column-major order.
+        
+        """
+        H = np.asfortranarray(H, dtype=float)
+        assert H.ndim==2, 'Input design matrix must be 2d.'
+        assert H.shape[1]>=self.nvars, \
+            'The model uses {} variables, but the design only has {}'.format(
+            self.nvars, H.shape[1])
+        
+        shape = (H.shape[0], len(self))
+        R = np.empty(shape, order='F') if out is None else check_out(out, shape)
+        arrays = {'R': R, 'H': H,
+                  'S': np.empty((H.shape[0], self._nscratch), order='F')}
+        
+        # One vectorized product per step
+        for (a, k), src, j in self._steps:
+            col = arrays[a][:, k]
+            if src is None:
+                col[...] = 1
+            elif j is None:
+                col[...] = arrays[src[0]][:, src[1]]
+            else:
+                np.multiply(arrays[src[0]][:, src[1]], H[:, j], out=col)
+        
+        return R
+
+_MODELS = ('linear', 'interaction', 'quadratic', 'cubic')
+
+@lru_cache(maxsize=128)
+def _compile_string(model, n):
+    if model in _MODELS:
+        assert n is not None, \
+            'The number of variables "n" is required for a "{}" model'.format(
+            model)
+        return _expand(model, n)
+    return _compile_terms(tuple(model.split()), model, n)
+
+def compile_model(model, n=None):
+    """
+    Compile a regression model into a reusable ``RegressionModel``
+    
+    Parameters
+    ----------
+    model : str
+        A string of tokens that define the regression model (e.g. 
+        '1 x0 x1 x0*x1 x0**2'), a list of such tokens or of tuples of
+        variable indices (e.g. ``[(), (0,), (0, 1), (0, 0)]``), or one of:
+        
+        - 'linear': the constant and the n variables,
+        - 'interaction': the linear terms and all the products of two
+          different variables,
+        - 'quadratic': the interaction terms and the squares,
+        - 'cubic': the quadratic terms and all the monomials of degree 3.
+    
+    Optional
+    --------
+    n : int
+        The number of variables. Required for the named models; for the
+        others, the model uses at least n variables (Default: None).
+    
+    Returns
+    -------
+    model : RegressionModel
+        The compiled model, with the exponent matrix of its terms.
     
+    Notes
+    -----
+    A token is "1" or a product of variables joined with "*", each of them
+    possibly raised to a power with "**". The models of the most recently
+    used 128 strings are kept, so that a string is parsed only once.
     
+    Example
+    -------
+    ::
+    
+        >>> compile_model('quadratic', 2)
+        RegressionModel('1 x0 x1 x0*x1 x0**2 x1**2')
+        >>> len(compile_model('quadratic', 30))
+        496
+    
+    """
+    if isinstance(model, RegressionModel):
+        return model
+    if isinstance(model, str):
+        return _compile_string(model, n)
+    return _compile_terms(tuple(model), model, n)
+
+def _expand(model, n):
+    """
+    The exponents of a named model of n variables
+    """
+    terms = [()] + [(i,) for i in range(n)]
+    if model!='linear':
+        terms += list(combinations(range(n), 2))
+    if model in ('quadratic', 'cubic'):
+        terms += [(i, i) for i in range(n)]
+    if model=='cubic':
+        terms += list(combinations_with_replacement(range(n), 3))
+    
+    exponents = np.zeros((len(terms), n), dtype=np.intp)
+    for t, term in enumerate(terms):
+        np.add.at(exponents[t], list(term), 1)
+    return RegressionModel(exponents)
+
+def _compile_terms(tokens, model, n=None):
+    factors = []
+    for token in tokens:
+        powers = {}
+        if not isinstance(token, str):
+            for j in token:
+                powers[int(j)] = powers.get(int(j), 0) + 1
+        elif token!='1':
+            for factor in token.replace('**', '^').split('*'):
+                match = _FACTOR.match(factor)
+                if match is None:
+                    raise ValueError('Invalid term "{}" in model "{}"'.format(
+                        token, model))
+                j = int(match.group(1))
+                powers[j] = powers.get(j, 0) + int(match.group(2) or 1)
+        factors.append(powers)
+    
+    nvars = max([max(f) + 1 for f in factors if f] + [n or 0])
+    exponents = np.zeros((len(factors), nvars), dtype=np.intp)
+    for t, powers in enumerate(factors):
+        for j, p in powers.items():
+            exponents[t, j] = p
+    names = [t if isinstance(t, str) else None for t in tokens]
+    if None in names:
+        names = None
+    return RegressionModel(exponents, names)
+
+def _term(e):
+    """
+    The name of the term with exponents e, e.g. "x0*x1**2"
+    """
+    names = ['x{}'.format(j) + ('**{}'.format(e[j]) if e[j]>1 else '')
+             for j in np.flatnonzero(e)]
+    return '*'.join(names) or '1'
+
+def _parent(e):
+    """
+    The exponents e without one factor of the last variable, and that
+    variable
+    """
+    j = max(i for i, p in enumerate(e) if p)
+    return e[:j] + (e[j] - 1,) + e[j + 1:], j
@@ -0,0 +1,279 @@
+"""
+Alias structure of 2-level fractional-factorial designs.
+
+An effect (a product of factors) is represented by a bitmask with one bit per
+column of the design, so that the product of two effects is the exclusive-or
+of their bitmasks. The defining relation of a ``fracfact`` generator is then
+the group of bitmasks spanned by its generated columns, and everything about
+the confounding of the design follows from it without building the design
+matrix.
+"""
+
+import numpy as np
+from collections import namedtuple
+from functools import lru_cache
+from itertools import combinations
+from pyDOE.doe_factorial import FracfactPlan, compile_fracfact
+
+__all__ = ['fracfact_alias', 'fracfact_opt']
+
+AliasStructure = namedtuple('AliasStructure',
+                            ['words', 'wlp', 'resolution', 'aliases'])
+
+def fracfact_alias(gen, order=2):
+    """
+    Compute the alias structure of a fractional-factorial generator
+
+    Parameters
+    ----------
+    gen : str
+        A generator string (or a plan from ``compile_fracfact``), as for
+        ``fracfact``.
+
+    Optional
+    --------
+    order : int
+        The highest order of the interactions listed in the alias chains
+        (Default: 2).
+
+    Returns
+    -------
+    alias : AliasStructure
+        A named tuple with the fields:
+
+        - ``words``: the words of the defining relation (I = ...), with a
+          "-" sign where the word equals -I, shortest first,
+        - ``wlp``: the word-length pattern, an array where ``wlp[i]`` is the
+          number of words of length i,
+        - ``resolution``: the length of the shortest word (None for a full
+          factorial design),
+        - ``aliases``: a dict mapping every effect of order at most ``order``
+          that is aliased with another such effect to the list of those
+          effects. An effect that is a word of the defining relation is
+          aliased with the mean, listed as "I" (or "-I").
+
+    Notes
+    -----
+    The factors are named after the columns of the design: "a", "b", "c",
+    ... if there are at most 26 of them, "x1", "x2", ... otherwise.
+
+    Example
+    -------
+    ::
+
+        >>> A = fracfact_alias("a b c ab ac")
+        >>> A.words
+        ['abd', 'ace', 'bcde']
+        >>> A.resolution
+        3
+        >>> A.aliases['a']
+        ['bd', 'ce']
+
+    """
+    plan = gen if isinstance(gen, FracfactPlan) else compile_fracfact(gen)
+    n = len(plan.signs)
+    assert n<=64, 'At most 64 factors are supported'
+    assert len(plan.products)<=20, \
+        'The defining relation of more than 20 generators is too large to list'
+    names = _names(n)
+
+    words, signs = _defining_relation(plan)
+    lengths = _popcount(words)
+
+    wlp = np.bincount(lengths, minlength=n + 1)
+    wlp[0] = 0
+    resolution = int(lengths[1:].min()) if len(words)>1 else None
+
+    order = min(order, n)
+    aliases = {}
+
+    # Only words of length up to 2*order can alias two effects of order up to
+    # ``order`` with each other
+    short = (lengths>0) & (lengths<=2*order)
+    swords, ssigns = words[short], signs[short]
+    for o in range(1, order + 1):
+        for factors in combinations(range(n), o):
+            e = np.uint64(sum(1 << f for f in factors))
+            a = swords ^ e
+            keep = _popcount(a)<=order
+            if np.any(keep):
+                aliases[_name(e, names)] = _sorted(a[keep], ssigns[keep], names)
+
+    order_ = np.lexsort((words, lengths))[1:]
+    return AliasStructure(_sorted(words[order_], signs[order_], names, False),
+                          wlp, resolution, aliases)
+
+################################################################################
+
+@lru_cache(maxsize=128)
+def fracfact_opt(n, runs, max_nodes=100000):
+    """
+    Find a minimum-aberration fractional-factorial generator
+    
+    Parameters
+    ----------
+    n : int
+        The number of factors.
+    runs : int
+        The number of runs, a power of 2 no greater than 2^n.
+    
+    Optional
+    --------
+    max_nodes : int
+        The largest number of partial generator sets examined (Default:
+        100000). For large problems the search stops there and the best
+        generator found so far is returned.
+    
+    Returns
+    -------
+    gen : str
+        A generator string for ``fracfact`` with the highest resolution and,
+        among those, the minimum aberration, i.e. the fewest words of the
+        shortest lengths.
+    
+    Notes
+    -----
+    With runs = 2^k, the first k factors are the main factors "a", "b", ...
+    and every other factor is a product of at least two of them. Generator
+    sets are built one generator at a time in a fixed order, so every set is
+    considered only once. The main factors that no chosen generator uses yet
+    are interchangeable, so a new generator may only add the first few of
+    them: any other choice gives the same design with the main factors
+    renamed. A partial set is abandoned as
+    soon as its word-length pattern is worse than the best complete one,
+    since adding generators only adds words. The word-length pattern of each
+    new generator is evaluated with bitmask arithmetic. Results are memoized.
+    
+    Example
+    -------
+    ::
+    
+        >>> fracfact_opt(7, 16)
+        'a b c d abc abd acd'
+        >>> fracfact_alias(fracfact_opt(7, 16)).resolution
+        4
+    
+    """
+    k = int(runs).bit_length() - 1
+    assert runs>0 and 2**k==runs, 'The number of runs must be a power of 2'
+    assert 2**k<=2**n, 'The number of runs must be no greater than 2^n'
+    assert k<=26, 'At most 26 main factors are supported'
+    p = n - k
+    assert p<=20, 'At most 20 generated factors are supported'
+    
+    # Candidate generators: products of at least two main factors, longest
+    # first
+    cands = [m for m in range(1, 2**k) if bin(m).count('1')>=2]
+    cands.sort(key=lambda m: (-bin(m).count('1'), m))
+    if p>len(cands):
+        raise ValueError('{} runs cannot hold {} factors'.format(runs, n))
+    
+    def add(words, wlp, m, j):
+        # The new words are the old ones times the new generator j
+        new = words ^ np.uint64(m | 1 << (k + j))
+        counts = np.bincount(_popcount(new), minlength=n + 1)
+        return new, tuple(a + b for a, b in zip(wlp, counts))
+    
+    def greedy(cands):
+        chosen = []
+        words = np.zeros(1, dtype=np.uint64)
+        wlp = (0,)*(n + 1)
+        for j in range(p):
+            trials = [(add(words, wlp, m, j), m) for m in cands 
+                      if m not in chosen]
+            (new, wlp), m = min(trials, key=lambda t: t[0][1])
+            words = np.concatenate((words, new))
+            chosen.append(m)
+        return [wlp, chosen]
+    
+    # Start from a greedy choice of generators, so that the search below can
+    # discard poor partial sets from the start. Products of an odd number of
+    # main factors only give words of even length, so when there are enough
+    # of them a greedy choice among them has resolution IV at least.
+    best = greedy(cands)  # word-length pattern, generators
+    odd = [m for m in cands if bin(m).count('1') % 2]
+    if len(odd)>=p:
+        best = min(best, greedy(odd))
+    nodes = [0]
+    
+    def search(start, chosen, words, wlp, t):
+        # The chosen generators use the main factors 0, 1, ..., t - 1
+        if len(chosen)==p:
+            best[0], best[1] = wlp, list(chosen)
+            return
+        for i in range(start, len(cands) - (p - len(chosen)) + 1):
+            if nodes[0]>=max_nodes:
+                return
+            m = cands[i]
+            high = m >> t
+            if high & (high + 1):
+                continue  # the unused factors it adds are not the first ones
+            nodes[0] += 1
+            
+            new, wlp2 = add(words, wlp, m, len(chosen))
+            if wlp2>=best[0]:
+                continue
+            search(i + 1, chosen + [m], np.concatenate((words, new)), wlp2,
+                   t + bin(high).count('1'))
+    
+    search(0, [], np.zeros(1, dtype=np.uint64), (0,)*(n + 1), 0)
+    
+    letters = [chr(97 + i) for i in range(k)]
+    gen = letters + [''.join(letters[i] for i in range(k) if m >> i & 1)
+                     for m in best[1]]
+    return ' '.join(gen)
+
+################################################################################
+
+def _defining_relation(plan):
+    """
+    All the words of the defining relation of a plan (the identity first) as
+    bitmasks over the columns, with their signs
+    """
+    # Generated column k is sign*product of main columns, so the word
+    # k*product of main columns equals sign*I
+    gens = []
+    for k, xx in plan.products:
+        w = 1 << k
+        s = plan.signs[k]
+        for i in xx:
+            w ^= 1 << plan.main[i]
+            s *= plan.signs[plan.main[i]]
+        gens.append((w, s))
+
+    words = np.zeros(1, dtype=np.uint64)
+    signs = np.ones(1, dtype=np.int8)
+    for w, s in gens:
+        words = np.concatenate((words, words ^ np.uint64(w)))
+        signs = np.concatenate((signs, signs*np.int8(s)))
+    return words, signs
+
+def _popcount(a):
+    a = np.asarray(a, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(a).astype(np.intp)
+    return _BYTECOUNT[a.reshape(a.shape + (1,)).view(np.uint8)].sum(axis=-1)
+
+_BYTECOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.intp)
+
+def _names(n):
+    if n<=26:
+        return [chr(97 + i) for i in range(n)]
+    return ['x{}'.format(i + 1) for i in range(n)]
+
+def _name(mask, names):
+    mask = int(mask)
+    if mask==0:
+        return 'I'
+    factors = [names[i] for i in range(len(names)) if mask >> i & 1]
+    sep = '' if len(names)<=26 else '*'
+    return sep.join(factors)
+
+def _sorted(words, signs, names, by_length=True):
+    """
+    Names of the given effects, with a "-" for negative signs, shortest first
+    """
+    if by_length:
+        order = np.lexsort((words, _popcount(words)))
+        words, signs = words[order], signs[order]
+    return [('-' if s<0 else '') + _name(w, names) for w, s in zip(words, signs)]
@@ -14,12 +14,12 @@ Abraham Lee.
 """
 
 import numpy as np
+import scipy.sparse as sps
 from pyDOE.doe_factorial import ff2n
-from pyDOE.doe_repeat_center import repeat_center
 
 __all__ = ['bbdesign']
 
-def bbdesign(n, center=None):
+def bbdesign(n, center=None, sparse=False):
     """
     Create a Box-Behnken design
     
@@ -32,10 +32,15 @@ def bbdesign(n, center=None):
     --------
     center : int
         The number of center points to include (default = 1).
+    sparse : bool or str
+        If True, return a ``scipy.sparse`` CSR matrix, built directly in
+        sparse form with the two nonzeros of each row. A format name such as
+        'coo' or 'csc' gives a sparse matrix of that format instead (Default:
+        False).
     
     Returns
     -------
-    mat : 2d-array
+    mat : 2d-array or sparse matrix
         The design matrix
     
     Example
@@ -62,30 +67,37 @@ def bbdesign(n, center=None):
     """
     assert n>=3, 'Number of variables must be at least 3'
     
-    # First, compute a factorial DOE with 2 parameters
-    H_fact = ff2n(2)
-    # Now we populate the real DOE with this DOE
-    
-    # We made a factorial design on each pair of dimensions
-    # - So, we created a factorial design with two factors
-    # - Make two loops
-    Index = 0
-    nb_lines = (n*(n-1)/2)*H_fact.shape[0]
-    H = repeat_center(n, nb_lines)
-    
-    for i in range(n - 1):
-        for j in range(i + 1, n):
-            Index = Index + 1
-            H[max([0, (Index - 1)*H_fact.shape[0]]):Index*H_fact.shape[0], i] = H_fact[:, 0]
-            H[max([0, (Index - 1)*H_fact.shape[0]]):Index*H_fact.shape[0], j] = H_fact[:, 1]
-
     if center is None:
         if n<=16:
             points= [0, 0, 0, 3, 3, 6, 6, 6, 8, 9, 10, 12, 12, 13, 14, 15, 16]
             center = points[n]
         else:
             center = n
-        
-    H = np.c_[H.T, repeat_center(n, center).T].T
+    
+    # First, compute a factorial DOE with 2 parameters
+    H_fact = ff2n(2)
+    
+    # We made a factorial design on each pair of dimensions (i, j): each pair
+    # gets a block of 4 rows holding the levels of i and j, and the center
+    # points follow
+    i, j = np.triu_indices(n, 1)
+    nb_lines = i.size*H_fact.shape[0]
+    
+    if sparse:
+        indices = np.empty((i.size, H_fact.shape[0], 2), dtype=np.intp)
+        indices[:, :, 0] = i[:, None]
+        indices[:, :, 1] = j[:, None]
+        data = np.broadcast_to(H_fact, indices.shape)
+        indptr = np.r_[np.arange(0, 2*nb_lines + 1, 2),
+                       np.full(center, 2*nb_lines)]
+        H = sps.csr_matrix((data.ravel(), indices.ravel(), indptr),
+                           shape=(nb_lines + center, n))
+        return H.asformat('csr' if sparse is True else sparse)
+    
+    # Now we populate the real DOE with this DOE, all blocks at once
+    H = np.zeros((nb_lines + center, n))
+    rows = np.arange(nb_lines).reshape(i.size, H_fact.shape[0])
+    H[rows, i[:, None]] = H_fact[:, 0]
+    H[rows, j[:, None]] = H_fact[:, 1]
     
     return H
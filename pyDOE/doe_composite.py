@@ -14,6 +14,7 @@ Abraham Lee.
 """
 
 import numpy as np
+import scipy.sparse as sps
 from pyDOE.doe_factorial import ff2n
 from pyDOE.doe_star import star
 from pyDOE.doe_union import union
@@ -21,7 +22,8 @@ from pyDOE.doe_repeat_center import repeat_center
 
 __all__ = ['ccdesign']
 
-def ccdesign(n, center=(4, 4), alpha='orthogonal', face='circumscribed'):
+def ccdesign(n, center=(4, 4), alpha='orthogonal', face='circumscribed',
+             sparse=False):
     """
     Central composite design
     
@@ -70,6 +72,12 @@ def ccdesign(n, center=(4, 4), alpha='orthogonal', face='circumscribed'):
            factorial or resolution V design with appropriate star points can 
            also produce this design.
     
+    sparse : bool or str
+        If True, return a ``scipy.sparse`` CSR matrix, in which the star
+        points and the center points are stored sparsely. A format name such
+        as 'coo' or 'csc' gives a sparse matrix of that format instead
+        (Default: False).
+    
     Notes
     -----
     - Fractional factorial designs are not (yet) available here.
@@ -79,7 +87,7 @@ def ccdesign(n, center=(4, 4), alpha='orthogonal', face='circumscribed'):
         
     Returns
     -------
-    mat : 2d-array
+    mat : 2d-array or sparse matrix
         The design matrix with coded levels -1 and 1
     
     Example
@@ -129,27 +137,34 @@ def ccdesign(n, center=(4, 4), alpha='orthogonal', face='circumscribed'):
 
     # Orthogonal Design
     if alpha.lower() in ('orthogonal', 'o'):
-        H2, a = star(n, alpha='orthogonal', center=center)
+        H2, a = star(n, alpha='orthogonal', center=center, sparse=sparse)
     
     # Rotatable Design
     if alpha.lower() in ('rotatable', 'r'):
-        H2, a = star(n, alpha='rotatable')
+        H2, a = star(n, alpha='rotatable', sparse=sparse)
     
     # Inscribed CCD
     if face.lower() in ('inscribed', 'cci'):
         H1 = ff2n(n)
         H1 = H1/a  # Scale down the factorial points
-        H2, a = star(n)
+        H2, a = star(n, sparse=sparse)
     
     # Faced CCD
     if face.lower() in ('faced', 'ccf'):
-        H2, a = star(n)  # Value of alpha is always 1 in Faced CCD
+        H2, a = star(n, sparse=sparse)  # Value of alpha is always 1 in Faced CCD
         H1 = ff2n(n)
     
     # Circumscribed CCD
     if face.lower() in ('circumscribed', 'ccc'):
         H1 = ff2n(n)
     
+    if sparse:
+        # The factorial points are dense, the rest only holds the star points
+        H = sps.vstack([sps.csr_matrix(H1),
+                        repeat_center(n, center[0], sparse=True), H2,
+                        repeat_center(n, center[1], sparse=True)], format='csr')
+        return H.asformat('csr' if sparse is True else sparse)
+    
     C1 = repeat_center(n, center[0])
     C2 = repeat_center(n, center[1])
 
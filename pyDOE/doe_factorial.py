@@ -13,12 +13,16 @@ Much thanks goes to these individuals. It has been converted to Python by
 Abraham Lee.
 """
 
-import re
 import numpy as np
+from collections import namedtuple
+from functools import lru_cache
+from pyDOE.output import check_out
+from pyDOE.doe_packed import PackedDesign, _packed_ff2n, _negate
 
-__all__ = ['np', 'fullfact', 'ff2n', 'fracfact']
+__all__ = ['np', 'fullfact', 'ff2n', 'fracfact', 'compile_fracfact', 
+           'FactorialDesign']
 
-def fullfact(levels):
+def fullfact(levels, out=None, dtype=None, lazy=False):
     """
     Create a general full-factorial design
     
@@ -28,6 +32,20 @@ def fullfact(levels):
         An array of integers that indicate the number of levels of each input
         design factor.
     
+    Optional
+    --------
+    out : array or str
+        An array to write the design into, or the name of a ``.npy`` file to
+        create and memory map for it (Default: None). The design is written
+        one column at a time.
+    dtype : dtype
+        The data type of the design matrix (Default: float). A small integer
+        type such as ``np.uint8`` uses a fraction of the memory.
+    lazy : bool
+        If True, return a ``FactorialDesign`` that computes rows only when
+        they are indexed, instead of the design matrix (Default: False).
+        Cannot be combined with ``out``.
+    
     Returns
     -------
     mat : 2d-array
@@ -62,28 +80,57 @@ def fullfact(levels):
                [ 1.,  2.,  2.],
                [ 0.,  3.,  2.],
                [ 1.,  3.,  2.]])
+    
+    A 12-factor, 4-level design stored as bytes::
+    
+        >>> fullfact([4]*12, dtype=np.uint8).nbytes
+        201326592
+    
+    Rows 1000 to 1002 of a 4^20 (about 10^12 run) design::
+    
+        >>> fullfact([4]*20, lazy=True)[1000:1003, :6]
+        array([[ 0.,  2.,  2.,  3.,  3.,  0.],
+               [ 1.,  2.,  2.,  3.,  3.,  0.],
+               [ 2.,  2.,  2.,  3.,  3.,  0.]])
                
     """
+    if lazy:
+        if out is not None:
+            raise ValueError('A lazy design cannot be written to "out"')
+        return FactorialDesign(levels, dtype=dtype)
+    
+    levels = [int(k) for k in levels]
+    dtype = np.dtype(float if dtype is None else dtype)
+    if dtype.kind in 'iu' and max(levels) - 1>np.iinfo(dtype).max:
+        raise ValueError('The levels do not fit in dtype {}'.format(dtype))
+    
     n = len(levels)  # number of factors
-    nb_lines = np.prod(levels)  # number of trial conditions
-    H = np.zeros((nb_lines, n))
+    nb_lines = 1  # number of trial conditions
+    for k in levels:
+        nb_lines *= k
+    if out is None:
+        H = np.empty((nb_lines, n), dtype=dtype)
+    else:
+        H = check_out(out, (nb_lines, n), dtype)
     
+    # Row r of the design is r written in the mixed radix given by the levels
+    # (first factor fastest), so column i counts 0, 1, ..., k - 1 with each
+    # value repeated level_repeat times, the whole sequence being repeated
+    # range_repeat times. That is a broadcast into a 3-d view of the column.
     level_repeat = 1
-    range_repeat = np.prod(levels)
+    range_repeat = nb_lines
     for i in range(n):
         range_repeat //= levels[i]
-        lvl = []
-        for j in range(levels[i]):
-            lvl += [j]*level_repeat
-        rng = lvl*range_repeat
+        col = H[:, i].view()
+        col.shape = (range_repeat, levels[i], level_repeat)
+        col[...] = np.arange(levels[i], dtype=dtype)[:, None]
         level_repeat *= levels[i]
-        H[:, i] = rng
      
     return H
     
 ################################################################################
 
-def ff2n(n):
+def ff2n(n, dtype=None, lazy=False, packed=False):
     """
     Create a 2-Level full-factorial design
     
@@ -92,6 +139,19 @@ def ff2n(n):
     n : int
         The number of factors in the design.
     
+    Optional
+    --------
+    dtype : dtype
+        The data type of the design matrix, float or a signed integer type
+        such as ``np.int8`` (Default: float). Other types raise a
+        ValueError, since they cannot hold the level -1.
+    lazy : bool
+        If True, return a ``FactorialDesign`` that computes rows only when
+        they are indexed, instead of the design matrix (Default: False).
+    packed : bool
+        If True, return a ``PackedDesign`` that stores one bit per cell
+        (Default: False).
+    
     Returns
     -------
     mat : 2d-array
@@ -112,19 +172,183 @@ def ff2n(n):
                [ 1.,  1.,  1.]])
        
     """
-    return 2*fullfact([2]*n) - 1
+    dtype = _coded_dtype(dtype)
+    if lazy:
+        return FactorialDesign([2]*n, dtype=dtype, coded=True)
+    if packed:
+        return _packed_ff2n(n)
+    
+    H = fullfact([2]*n, dtype=dtype)
+    H *= 2
+    H -= 1
+    return H
 
 ################################################################################
 
-def fracfact(gen):
+class FactorialDesign(object):
+    """
+    A full-factorial design whose rows are computed only when indexed
+    
+    Parameters
+    ----------
+    levels : array-like
+        An array of integers that indicate the number of levels of each input
+        design factor.
+    
+    Optional
+    --------
+    dtype : dtype
+        The data type of the rows (Default: float).
+    coded : bool
+        If True, the levels 0 and 1 of 2-level factors are coded as -1 and 1,
+        as in ``ff2n`` (Default: False).
+    
+    Notes
+    -----
+    Row r of the design is r written in the mixed radix given by the levels
+    (first factor fastest), so any row can be decoded from its index. The
+    design supports ``len()``, integer, slice, boolean and fancy indexing of
+    the rows (optionally followed by a column index), ``iterchunks`` to work
+    through it a block of rows at a time and ``toarray`` to build the whole
+    matrix. The rows are the same as those of ``fullfact`` (or ``ff2n``).
+    
+    Example
+    -------
+    Hand a 2^30 run design to workers one million rows at a time::
+    
+        >>> H = ff2n(30, lazy=True)
+        >>> len(H)
+        1073741824
+        >>> for chunk in H.iterchunks(10**6):
+        ...     submit(chunk)
+    
+    """
+    def __init__(self, levels, dtype=None, coded=False):
+        self.levels = [int(k) for k in levels]
+        assert all(k>0 for k in self.levels), 'Levels must be positive integers'
+        if coded:
+            assert all(k==2 for k in self.levels), \
+                'Only 2-level designs can be coded as -1 and 1'
+        self.coded = coded
+        self.dtype = _coded_dtype(dtype) if coded else np.dtype(
+            float if dtype is None else dtype)
+        
+        nb_lines = 1
+        for k in self.levels:
+            nb_lines *= k
+        if nb_lines>=2**63:
+            raise OverflowError('The design has too many rows to index')
+        self._len = nb_lines
+        
+        # The place values of the mixed-radix row index
+        self._radix = np.cumprod([1] + self.levels[:-1], dtype=np.int64)
+    
+    @property
+    def shape(self):
+        return (self._len, len(self.levels))
+    
+    @property
+    def ndim(self):
+        return 2
+    
+    def __len__(self):
+        return self._len
+    
+    def __repr__(self):
+        return 'FactorialDesign(levels={}, coded={})'.format(self.levels, 
+                                                             self.coded)
+    
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        rows = self._rows(key[0])
+        
+        H = self._decode(rows)
+        if np.ndim(rows)==0:
+            return H[0][key[1:]]
+        return H[(slice(None),) + key[1:]]
+    
+    def __iter__(self):
+        for chunk in self.iterchunks():
+            for row in chunk:
+                yield row
+    
+    def __array__(self, dtype=None, copy=None):
+        H = self.toarray()
+        return H if dtype is None else H.astype(dtype)
+    
+    def iterchunks(self, size=65536):
+        """
+        Iterate over the design in blocks of (at most) ``size`` rows
+        """
+        for i in range(0, self._len, size):
+            yield self[i:i + size]
+    
+    def toarray(self):
+        """
+        Build the whole design matrix
+        """
+        return self[:]
+    
+    def _rows(self, key):
+        N = self._len
+        if isinstance(key, slice):
+            return np.arange(*key.indices(N), dtype=np.int64)
+        
+        rows = np.asarray(key)
+        if rows.size==0 and rows.dtype.kind=='f':
+            # An empty list, as NumPy treats it
+            rows = rows.astype(np.int64)
+        if rows.dtype==bool:
+            if rows.shape!=(N,):
+                raise IndexError('Boolean index must have length {}'.format(N))
+            return np.flatnonzero(rows)
+        if rows.dtype.kind not in 'iu':
+            raise IndexError('Only integers, slices and integer or boolean '
+                             'arrays are valid indices')
+        
+        rows = rows.astype(np.int64)
+        if np.any(rows>=N) or np.any(rows<-N):
+            raise IndexError('Row index out of range for {} rows'.format(N))
+        return rows % N
+    
+    def _decode(self, rows):
+        rows = np.atleast_1d(rows)
+        H = (rows[..., None]//self._radix) % self.levels
+        if self.coded:
+            H = 2*H - 1
+        return H.astype(self.dtype)
+
+def _coded_dtype(dtype):
+    """
+    The dtype of a design with levels -1 and 1: float or a signed integer
+    """
+    dtype = np.dtype(float if dtype is None else dtype)
+    if dtype.kind not in 'if':
+        raise ValueError('A design with levels -1 and 1 needs a float or '
+                         'signed integer dtype, not {}'.format(dtype))
+    return dtype
+
+################################################################################
+
+def fracfact(gen, packed=False):
     """
     Create a 2-level fractional-factorial design with a generator string.
     
     Parameters
     ----------
-    gen : str
+    gen : str or sequence
         A string, consisting of lowercase, uppercase letters or operators "-"
-        and "+", indicating the factors of the experiment
+        and "+", indicating the factors of the experiment. Factors can also be
+        named with tokens such as "x1" and multiplied with "*", or given as a
+        sequence of main-factor indices (see Notes). A plan returned by
+        ``compile_fracfact`` can be given instead.
+    
+    Optional
+    --------
+    packed : bool
+        If True, return a ``PackedDesign`` that stores one bit per cell
+        (Default: False).
     
     Returns
     -------
@@ -161,6 +385,24 @@ def fracfact(gen):
     then columns H[:, 0], H[:, 1], and H[:, 3] include the two level full
     factorial design and H[:, 2] includes the products of the main factors.
     
+    Letters limit ``gen`` to 26 main factors. For larger designs, name the
+    factors with tokens of letters, digits and underscores, and join the
+    factors of a product with "*". For example, if
+    
+        gen = "x1 x2 -x1*x2 x3 x1*x2*x3"
+    
+    then "x1", "x2" and "x3" are the main factors and the products refer to
+    them by name. A string is read as tokens when it contains "*", a token
+    that is not made of letters only, or no single-letter main factor, so
+    "temp pressure" names two main factors. The same design as above is
+    given by the sequence
+    
+        gen = [0, 1, (0, 1), 2, (0, 1, 2)]
+    
+    where every column is the index of a main factor, counting from 0, or a
+    tuple of the indices of the main factors it is the product of. A negative
+    sign is written as a product with -1 in this form, e.g. ``(-1, 0, 1)``.
+    
     Examples
     --------
     ::
@@ -188,56 +430,172 @@ def fracfact(gen):
                [ 1.,  1., -1.,  1.,  1.]])
        
     """
-    # Recognize letters and combinations
-    A = [item for item in re.split('\-?\s?\+?', gen) if item]  # remove empty strings
-    C = [len(item) for item in A]
+    plan = gen if isinstance(gen, FracfactPlan) else compile_fracfact(gen)
     
-    # Indices of single letters (main factors)
-    I = [i for i, item in enumerate(C) if item==1]
+    # Fill in design with two level factorial design, in packed form so that
+    # the products of columns are exclusive-ors of 64 rows at a time
+    H1 = ff2n(len(plan.main), packed=True)
+    H = np.empty((len(plan.signs), H1.words.shape[1]), dtype=np.uint64)
+    H[list(plan.main)] = H1.words
     
-    # Indices of letter combinations (we need them to fill out H2 properly).
-    J = [i for i, item in enumerate(C) if item!=1]
+    # Fill in the rest of the matrix with the proper products
+    for k, xx in plan.products:
+        H[k] = H1.product(xx)
     
-    # Check if there are "-" or "+" operators in gen
-    U = [item for item in gen.split(' ') if item]  # remove empty strings
+    # Update design where gen includes the "-" operator
+    for k, sign in enumerate(plan.signs):
+        if sign<0:
+            H[k] = _negate(H[k], H1.m)
     
-    # If R1 is either None or not, the result is not changed, since it is a
-    # multiplication of 1.
-    R1 = _grep(U, '+')
-    R2 = _grep(U, '-')
+    # Return the fractional factorial design
+    H = PackedDesign(H, H1.m)
+    return H if packed else H.unpack()
+
+################################################################################
+
+FracfactPlan = namedtuple('FracfactPlan', ['main', 'products', 'signs'])
+FracfactPlan.__doc__ = """
+A compiled ``fracfact`` generator
+
+main : tuple
+    The columns of the design that hold the main factors, in order.
+products : tuple
+    A ``(column, factors)`` pair for every other column of the design, where
+    ``factors`` are the indices of the main factors whose product it is.
+signs : tuple
+    The sign (1 or -1) of every column of the design.
+"""
+
+def compile_fracfact(gen):
+    """
+    Compile a ``fracfact`` generator string into a reusable plan.
     
-    # Fill in design with two level factorial design
-    H1 = ff2n(len(I))
-    H = np.zeros((H1.shape[0], len(C)))
-    H[:, I] = H1
+    Parameters
+    ----------
+    gen : str or sequence
+        A generator, as for ``fracfact``.
     
-    # Recognize combinations and fill in the rest of matrix H2 with the proper
-    # products
-    for k in J:
-        # For lowercase letters
-        xx = np.array([ord(c) for c in A[k]]) - 97
-        
-        # For uppercase letters
-        if np.any(xx<0):
-            xx = np.array([ord(c) for c in A[k]]) - 65
-        
-        H[:, k] = np.prod(H1[:, xx], axis=1)
+    Returns
+    -------
+    plan : FracfactPlan
+        The main-factor columns, the product columns with the main factors
+        they multiply, and the sign of every column. It can be passed to
+        ``fracfact`` in place of ``gen``.
+    
+    Notes
+    -----
+    ``fracfact`` compiles its generator string with this function, which
+    keeps the plans of the most recently used 256 generators, so that calling
+    ``fracfact`` repeatedly with the same generator parses it only once.
     
-    # Update design if gen includes "-" operator
-    if R2:
-        H[:, R2] *= -1
+    Example
+    -------
+    ::
+    
+        >>> compile_fracfact("a b -ab c +abc")
+        FracfactPlan(main=(0, 1, 3), products=((2, (0, 1)), (4, (0, 1, 2))), signs=(1, 1, -1, 1, 1))
         
-    # Return the fractional factorial design
-    return H
+        >>> compile_fracfact("x1 x2 -x1*x2 x3 x1*x2*x3")==compile_fracfact("a b -ab c abc")
+        True
     
-def _grep(haystack, needle):
-    try:
-        haystack[0]
-    except (TypeError, AttributeError):
-        return [0] if needle in haystack else []
-    else:
-        locs = []
-        for idx, item in enumerate(haystack):
-            if needle in item:
-                locs += [idx]
-        return locs
+    """
+    if not isinstance(gen, str):
+        gen = tuple(tuple(int(i) for i in item) if np.iterable(item)
+                    else (int(item),) for item in gen)
+    return _compile_fracfact(gen)
+
+@lru_cache(maxsize=256)
+def _compile_fracfact(gen):
+    if not isinstance(gen, str):
+        return _compile_indices(gen)
+    
+    # Letters are used only when every item is made of letters and at least
+    # one of them is a single-letter main factor, so that "temp pressure"
+    # names two main factors rather than two products of letters
+    items = gen.split()
+    names = [item.lstrip('+-') for item in items]
+    if ('*' in gen or not all(name.isalpha() for name in names) or 
+        not any(len(name)==1 for name in names)):
+        return _compile_tokens(gen, items)
+    
+    main = []
+    products = []
+    signs = []
+    for k, item in enumerate(items):
+        # Check for "-" or "+" operators
+        signs.append(-1 if item.startswith('-') else 1)
+        letters = item.lstrip('+-').lower()
+        
+        if len(letters)==1:
+            main.append(k)
+        else:
+            products.append((k, tuple(ord(c) - 97 for c in letters)))
+    
+    for k, xx in products:
+        if not all(0<=i<len(main) for i in xx):
+            raise ValueError('Factor "{}" in generator "{}" uses a letter '
+                             'beyond the {} main factors'.format(items[k], gen,
+                                                                 len(main)))
+    return FracfactPlan(tuple(main), tuple(products), tuple(signs))
+
+def _compile_tokens(gen, items):
+    """
+    Compile a generator string of named factors joined with "*"
+    """
+    factors = []
+    signs = []
+    for item in items:
+        signs.append(-1 if item.startswith('-') else 1)
+        names = item.lstrip('+-').split('*')
+        if not all(name and name.replace('_', 'a').isalnum() for name in names):
+            raise ValueError('Invalid factor "{}" in generator "{}"'.format(
+                item, gen))
+        factors.append(names)
+    
+    main = [k for k, names in enumerate(factors) if len(names)==1]
+    index = {}
+    for i, k in enumerate(main):
+        name = factors[k][0]
+        if name in index:
+            raise ValueError('Main factor "{}" appears twice in generator "{}"'
+                             .format(name, gen))
+        index[name] = i
+    
+    products = []
+    for k, names in enumerate(factors):
+        if len(names)>1:
+            unknown = [name for name in names if name not in index]
+            if unknown:
+                raise ValueError('Unknown factor "{}" in generator "{}"'
+                                 .format(unknown[0], gen))
+            products.append((k, tuple(index[name] for name in names)))
+    
+    return FracfactPlan(tuple(main), tuple(products), tuple(signs))
+
+def _compile_indices(gen):
+    """
+    Compile a generator given as tuples of main-factor indices, where -1
+    stands for a negative sign
+    """
+    main = []
+    products = []
+    signs = []
+    for k, item in enumerate(gen):
+        signs.append(-1 if item.count(-1) % 2 else 1)
+        xx = tuple(i for i in item if i!=-1)
+        if min(xx, default=-1)<0:
+            raise ValueError('Invalid factor {} in generator'.format(item))
+        
+        if len(xx)==1:
+            if xx[0]!=len(main):
+                raise ValueError('Column {} is main factor {}, but main factors '
+                                 'must be numbered in order from 0'.format(k, xx[0]))
+            main.append(k)
+        else:
+            products.append((k, xx))
+    
+    for k, xx in products:
+        if max(xx)>=len(main):
+            raise ValueError('Column {} uses main factor {}, but there are only '
+                             '{} main factors'.format(k, max(xx), len(main)))
+    return FracfactPlan(tuple(main), tuple(products), tuple(signs))
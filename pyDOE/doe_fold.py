@@ -14,10 +14,11 @@ Abraham Lee.
 """
 
 import numpy as np
+from pyDOE.output import check_out
 
 __all__ = ['fold']
 
-def fold(H, columns=None):
+def fold(H, columns=None, out=None, half=False):
     """
     Fold a design to reduce confounding effects.
     
@@ -28,6 +29,13 @@ def fold(H, columns=None):
     columns : array
         Indices of of columns to fold (Default: None). If ``columns=None`` is
         used, then all columns will be folded.
+    out : array or str
+        An array to write the result into, or the name of a ``.npy`` file
+        to create (see ``pyDOE.output``). With ``half=True``, ``out`` can be
+        ``H`` itself to fold it in place.
+    half : bool
+        If True, return only the folded half of the design, i.e. the second
+        half of the full result, without the original runs (Default: False).
     
     Returns
     -------
@@ -38,23 +46,49 @@ def fold(H, columns=None):
     --------
     ::
     
+        >>> fold([[-1, -1], [1, -1], [-1, 1], [1, 1]], columns=[1])
+        array([[-1, -1],
+               [ 1, -1],
+               [-1,  1],
+               [ 1,  1],
+               [-1,  1],
+               [ 1,  1],
+               [-1, -1],
+               [ 1, -1]])
+    
     """
-    H = np.array(H)
+    H = np.asarray(H)
     assert len(H.shape)==2, 'Input design matrix must be 2d.'
     
     if columns is None:
-        columns = range(H.shape[1])
+        columns = slice(None)
+    else:
+        columns = np.asarray(columns, dtype=np.intp)
     
-    Hf = H.copy()
+    # Each folded column swaps its two levels: lo + hi - x maps lo to hi and
+    # hi to lo
+    Hc = H[:, columns]
+    lo = Hc.min(axis=0)
+    hi = Hc.max(axis=0)
+    assert np.all(lo<hi) and np.all((Hc==lo) | (Hc==hi)), \
+        'Input design matrix must be 2-level factors only.'
+    Hc = lo + hi - Hc
     
-    for col in columns:
-        vals = np.unique(H[:, col])
-        assert len(vals)==2, 'Input design matrix must be 2-level factors only.'
-        
-        for i in range(H.shape[0]):
-            Hf[i, col] = vals[0] if H[i, col]==vals[1] else vals[1]
+    m = H.shape[0]
+    shape = H.shape if half else (2*m, H.shape[1])
+    if out is None:
+        Hf = np.empty(shape, dtype=H.dtype)
+    else:
+        Hf = check_out(out, shape, dtype=H.dtype)
     
-    Hf = np.vstack((H, Hf))
+    if not half:
+        Hf[:m] = H
+        Hf[m:] = H
+        Hf[m:, columns] = Hc
+    else:
+        if Hf is not H:
+            Hf[...] = H
+        Hf[:, columns] = Hc
     
     return Hf
         
@@ -0,0 +1,317 @@
+"""
+Hadamard matrices for Plackett-Burman designs.
+
+A Hadamard matrix of order N is an N-by-N matrix of -1 and 1 whose columns
+are orthogonal. N must be 1, 2 or a multiple of 4, and a matrix is built
+here with the first construction that applies:
+
+- the historical ``pbdesign`` matrices of orders 2^k, 12*2^k and 20*2^k,
+  so that their designs do not change,
+- Paley's construction I, of order q + 1 for a prime power q = 3 (mod 4),
+- Paley's construction II, of order 2*(q + 1) for a prime power q = 1
+  (mod 4),
+- Williamson's construction, of order 4*m for odd m <= 23,
+- Sylvester doubling and Kronecker products of smaller Hadamard matrices.
+
+The matrices are normalized (first row and first column all ones). Those
+of order up to 1024 (at most 1 MiB each) are kept in a bounded cache, so
+that the usual orders are constructed only once per process; larger ones
+are rebuilt when needed rather than held in memory for good.
+"""
+
+import numpy as np
+from functools import lru_cache
+from scipy.linalg import toeplitz, hankel
+
+__all__ = ['hadamard']
+
+# First rows of symmetric circulant matrices A, B, C, D of odd order m with
+# A^2 + B^2 + C^2 + D^2 = 4*m*I, for Williamson's construction ("+" is 1,
+# "-" is -1)
+_WILLIAMSON = {
+    3: ('+++', '+--', '+--', '+--'),
+    5: ('+-++-', '++--+', '+----', '+----'),
+    7: ('+-++++-', '+-++++-', '+--++--', '+++--++'),
+    9: ('+-++++++-', '+--++++--', '+---++---', '++-+--+-+'),
+    11: ('+--++++++--', '+-+-++++-+-', '+----++----', '++--+--+--+'),
+    13: ('+--++++++++--', '+++-+-++-+-++', '+-++--++--++-', '+-+++----+++-'),
+    15: ('++--++++++++--+', '+-+-++-++-++-+-', '++---+-++-+---+',
+         '++-++------++-+'),
+    17: ('+--+-++++++++-+--', '+-++-+++--+++-++-', '++-+---+--+---+-+',
+         '+---+++----+++---'),
+    19: ('+--+-++++++++++-+--', '+++-+---++++---+-++', '+-+++--+-++-+--+++-',
+         '+-+++--++--++--+++-'),
+    21: ('+-++--++++++++++--++-', '++----+-++++++-+----+',
+         '+-+++-+---++---+-+++-', '+-++-+--++--++--+-++-'),
+    23: ('+--+-+-++++++++++-+-+--', '+--++-+-+-++++-+-+-++--',
+         '+++---++--++++--++---++', '+--+--+++------+++--+--'),
+    }
+_CACHE_MAX_ORDER = 1024
+
+def hadamard(N, dtype=float):
+    """
+    Create a normalized Hadamard matrix
+
+    Parameters
+    ----------
+    N : int
+        The order of the matrix: 1, 2 or a multiple of 4.
+
+    Optional
+    --------
+    dtype : dtype
+        The data type of the matrix, float or a signed integer type
+        (Default: float).
+
+    Returns
+    -------
+    H : 2d-array
+        An N-by-N matrix of -1 and 1 with ``H.T @ H == N*I``, whose first
+        row and first column are all ones.
+
+    Raises
+    ------
+    ValueError
+        If ``N`` is not a valid order, if none of the constructions of this
+        module applies to it (the smallest such order is 116), or if
+        ``dtype`` cannot hold -1.
+
+    Example
+    -------
+    ::
+
+        >>> hadamard(4)
+        array([[ 1.,  1.,  1.,  1.],
+               [ 1., -1.,  1., -1.],
+               [ 1.,  1., -1., -1.],
+               [ 1., -1., -1.,  1.]])
+
+    """
+    dtype = np.dtype(dtype)
+    if dtype.kind not in 'if':
+        raise ValueError('A Hadamard matrix needs a float or signed integer '
+                         'dtype, not {}'.format(dtype))
+    H = _hadamard(int(N))
+    if H is None:
+        raise ValueError('No Hadamard matrix of order {} can be '
+                         'constructed'.format(N))
+    return H.astype(dtype)
+
+def _hadamard(N):
+    """
+    The read-only int8 Hadamard matrix of order N, or None
+    """
+    if N<=_CACHE_MAX_ORDER:
+        return _cached_hadamard(N)
+    return _build(N)
+
+@lru_cache(maxsize=128)
+def _cached_hadamard(N):
+    return _build(N)
+
+def _build(N):
+    if N<1 or (N>2 and N % 4):
+        return None
+
+    H = _historical(N)
+    if H is None:
+        H = _paley1(N)
+    if H is None:
+        H = _paley2(N)
+    if H is None:
+        H = _williamson(N)
+    if H is None:
+        H = _product(N)
+    if H is None:
+        return None
+
+    H = _normalize(H)
+    H.flags.writeable = False
+    return H
+
+def _normalize(H):
+    H = H.astype(np.int8, copy=False)
+    H *= H[:, :1].copy()
+    H *= H[:1, :].copy()
+    return H
+
+def _double(H, e):
+    """
+    Apply e Sylvester doublings [[H, H], [H, -H]] to H, in place in one
+    preallocated int8 buffer
+    """
+    s = H.shape[0]
+    out = np.empty((s << e, s << e), dtype=np.int8)
+    out[:s, :s] = H
+    for i in range(e):
+        out[:s, s:2*s] = out[:s, :s]
+        out[s:2*s, :s] = out[:s, :s]
+        np.negative(out[:s, :s], out=out[s:2*s, s:2*s])
+        s *= 2
+    return out
+
+################################################################################
+
+def _historical(N):
+    """
+    The matrix pbdesign has always used for N = 2^k, 12*2^k and 20*2^k
+    """
+    for base in (1, 12, 20):
+        e = (N//base).bit_length() - 1
+        if N % base==0 and N//base==2**e:
+            break
+    else:
+        return None
+
+    if base==1:
+        H = np.ones((1, 1), dtype=np.int8)
+    elif base==12:
+        H = np.vstack((np.ones((1, 12)), np.hstack((np.ones((11, 1)),
+            toeplitz([-1, -1, 1, -1, -1, -1, 1, 1, 1, -1, 1],
+                     [-1, 1, -1, 1, 1, 1, -1, -1, -1, 1, -1])))))
+    else:
+        H = np.vstack((np.ones((1, 20)), np.hstack((np.ones((19, 1)),
+            hankel(
+            [-1, -1, 1, 1, -1, -1, -1, -1, 1, -1, 1, -1, 1, 1, 1, 1, -1, -1, 1],
+            [1, -1, -1, 1, 1, -1, -1, -1, -1, 1, -1, 1, -1, 1, 1, 1, 1, -1, -1])
+            ))))
+
+    # Kronecker product construction
+    return _double(H, e)
+
+def _paley1(N):
+    """
+    Paley's construction I, for N - 1 a prime power equal to 3 mod 4
+    """
+    q = N - 1
+    if q % 4!=3 or _prime_power(q) is None:
+        return None
+
+    Q = _jacobsthal(q)
+    S = np.zeros((N, N), dtype=int)
+    S[0, 1:] = 1
+    S[1:, 0] = -1
+    S[1:, 1:] = Q
+    return S + np.eye(N, dtype=int)
+
+def _paley2(N):
+    """
+    Paley's construction II, for N/2 - 1 a prime power equal to 1 mod 4
+    """
+    q = N//2 - 1
+    if N % 2 or q % 4!=1 or _prime_power(q) is None:
+        return None
+
+    Q = _jacobsthal(q)
+    C = np.zeros((q + 1, q + 1), dtype=int)
+    C[0, 1:] = 1
+    C[1:, 0] = 1
+    C[1:, 1:] = Q
+    return (np.kron(C, [[1, 1], [1, -1]]) +
+            np.kron(np.eye(q + 1, dtype=int), [[1, -1], [-1, -1]]))
+
+def _williamson(N):
+    """
+    Williamson's construction, for N = 4*m with m odd and at most 23
+    """
+    if N % 4 or N//4 not in _WILLIAMSON:
+        return None
+
+    A, B, C, D = [_circulant(np.array([1 if c=='+' else -1 for c in row]))
+                  for row in _WILLIAMSON[N//4]]
+    return np.block([[ A,  B,  C,  D],
+                     [-B,  A, -D,  C],
+                     [-C,  D,  A, -B],
+                     [-D, -C,  B,  A]])
+
+def _product(N):
+    """
+    The Kronecker product of two smaller Hadamard matrices, if any
+    """
+    half = _hadamard(N//2) if N % 8==0 else None
+    if half is not None:
+        return _double(half, 1)
+    for a in range(4, int(N**0.5) + 1, 4):
+        if N % a==0 and (N//a) % 4==0:
+            Ha, Hb = _hadamard(a), _hadamard(N//a)
+            if Ha is not None and Hb is not None:
+                return np.kron(Ha.astype(int), Hb.astype(int))
+    return None
+
+################################################################################
+
+def _prime_power(q):
+    """
+    (p, k) such that q = p^k with p prime, or None
+    """
+    if q<2:
+        return None
+    p = next(d for d in range(2, q + 1) if q % d==0)
+    k = 0
+    while q % p==0:
+        q //= p
+        k += 1
+    return (p, k) if q==1 else None
+
+def _jacobsthal(q):
+    """
+    The Jacobsthal matrix Q[a, b] = chi(a - b) of GF(q), where chi is the
+    quadratic character
+
+    The elements of GF(p^k) are the integers 0, ..., q - 1, whose base-p
+    digits are the coefficients of polynomials modulo an irreducible
+    polynomial of degree k.
+    """
+    p, k = _prime_power(q)
+    digits = (np.arange(q)[:, None]//p**np.arange(k)) % p
+
+    # The nonzero squares
+    f = _irreducible(p, k)
+    chi = -np.ones(q, dtype=int)
+    chi[0] = 0
+    for x in digits[1:]:
+        sq = _polymulmod(x, x, f, p)
+        chi[int(np.dot(sq, p**np.arange(k)))] = 1
+
+    diff = (digits[:, None, :] - digits[None, :, :]) % p
+    return chi[diff @ p**np.arange(k)]
+
+def _polymulmod(a, b, f, p):
+    """
+    The product of the polynomials a and b modulo the monic polynomial f,
+    with coefficients in GF(p), lowest degree first
+    """
+    k = len(f) - 1
+    c = np.convolve(a, b) % p
+    for i in range(len(c) - 1, k - 1, -1):
+        if c[i]:
+            c[i - k:i + 1] = (c[i - k:i + 1] - c[i]*f) % p
+    return c[:k]
+
+def _irreducible(p, k):
+    """
+    A monic irreducible polynomial of degree k over GF(p)
+    """
+    for low in range(p**k):
+        f = np.r_[(low//p**np.arange(k)) % p, 1]
+        if all(_polymod(f, g, p).any() for d in range(1, k//2 + 1)
+               for g in _monic(p, d)):
+            return f
+
+def _monic(p, d):
+    for low in range(p**d):
+        yield np.r_[(low//p**np.arange(d)) % p, 1]
+
+def _polymod(a, g, p):
+    a = a.copy()
+    d = len(g) - 1
+    for i in range(len(a) - 1, d - 1, -1):
+        if a[i]:
+            a[i - d:i + 1] = (a[i - d:i + 1] - a[i]*g) % p
+    return a[:d]
+
+################################################################################
+
+def _circulant(x):
+    m = len(x)
+    return x[(np.arange(m)[None, :] - np.arange(m)[:, None]) % m]
@@ -13,12 +13,21 @@ Much thanks goes to these individuals. It has been converted to Python by
 Abraham Lee.
 """
 
+import os
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from math import factorial
+from scipy.linalg import cholesky, solve_triangular
+from scipy.special import ndtri
+from pyDOE.random_state import check_random_state, spawn_random_states
+from pyDOE.output import check_out, column_blocks
 
-__all__ = ['lhs']
+__all__ = ['lhs', 'LatinHypercube']
 
-def lhs(n, samples=None, criterion=None, iterations=None):
+def lhs(n, samples=None, criterion=None, iterations=None, method=None,
+        tol=None, corrmat=None, n_jobs=None, random_state=None, batch=None,
+        scores=False, compact=False, out=None):
     """
     Generate a latin-hypercube design
     
@@ -37,13 +46,72 @@ def lhs(n, samples=None, criterion=None, iterations=None):
         given, the design is simply randomized.
     iterations : int
         The number of iterations in the maximin and correlations algorithms
-        (Default: 5).
+        (Default: 5). For the "correlation" criterion, each iteration is a
+        round of up to ``20*n`` element exchanges in a single design.
+    method : str
+        The optimizer used by the "maximin" and "centermaximin" criteria.
+        Allowable values are "random" (Default), which keeps the best of
+        ``iterations`` random designs, and "ese", the enhanced stochastic
+        evolutionary algorithm, which improves a single design through
+        ``iterations`` rounds of element exchanges within its columns.
+    tol : scalar
+        For the "correlation" criterion, the optimization stops as soon as the
+        largest absolute correlation coefficient between any two factors is
+        no more than ``tol`` (Default: 1/samples, well below the sampling
+        error of a correlation coefficient). Use 0 to run all the iterations.
+    corrmat : 2d-array
+        An n-by-n target correlation matrix (symmetric, positive definite and
+        with a unit diagonal). If given, the samples of each factor are
+        re-paired by the Iman-Conover method so that the rank correlation
+        between the factors approximates ``corrmat``. The values of each
+        factor, and so the latin-hypercube property, are unchanged.
+    n_jobs : int
+        The number of worker processes used by the "maximin", "centermaximin"
+        and "correlation" criteria (Default: 1). With the "random" method the
+        ``iterations`` candidates are shared out among the workers; the other
+        optimizers run one independent search per worker. Each worker draws
+        from its own random stream and the best design is returned. A value
+        of -1 uses all the available CPUs.
+    random_state : int, SeedSequence or Generator
+        The seed or ``numpy.random.Generator`` to draw the design from
+        (Default: None, draw from NumPy's global random state). Designs
+        generated from the same seed are identical, also with ``n_jobs``.
+        See ``spawn_random_states`` to create independent generators for
+        parallel threads or processes.
+    batch : int
+        If given, generate ``batch`` independent designs at once and return
+        them as a batch-by-samples-by-n array (Default: None). Without an
+        optimizing criterion all the designs are built in one vectorized pass.
+    scores : bool
+        If True, also return the quality of the design(s): the largest
+        absolute correlation coefficient between two factors for the
+        "correlation" criterion, otherwise the smallest distance between two
+        samples (Default: False).
+    compact : bool
+        If True, return the design as a ``LatinHypercube``, which stores only
+        the interval index of every sample as a uint16 (or uint32 for more
+        than 65536 samples) and converts to floats when indexed (Default:
+        False). For the "center" criteria the points are at the interval
+        centers; without a criterion a random position within each interval
+        is regenerated on access from a stored seed. Not available with
+        ``batch``, or with the "maximin" and "correlation" criteria, whose
+        optimized positions within the intervals cannot be stored this way.
+    out : array or str
+        An array to write the design into, or the name of a ``.npy`` file to
+        create and memory map for it (Default: None). Without an optimizing
+        criterion or ``corrmat``, the design is generated a block of columns
+        at a time, so that only a bounded amount of working memory is needed
+        and designs bigger than the memory can be written to disk.
     
     Returns
     -------
     H : 2d-array
         An n-by-samples design matrix that has been normalized so factor values
         are uniformly spaced between zero and one.
+    score : scalar or 1d-array
+        The quality of each design (only if ``scores`` is True).
+    
+    If ``compact`` is True, ``H`` is a ``LatinHypercube`` instead.
     
     Example
     -------
@@ -82,121 +150,649 @@ def lhs(n, samples=None, criterion=None, iterations=None):
                [ 0.98431735,  0.0380364 ,  0.01621717],
                [ 0.40414671,  0.33339132,  0.84845707]])
        
-    A 4-factor design with 5 samples where the samples are as uncorrelated
+    The same, but optimized by exchanging elements within the columns of a
+    single design rather than by drawing random designs::
+    
+        >>> lhs(3, samples=4, criterion='maximin', method='ese')
+       
+    A 4-factor design with 5 samples where the factors are as uncorrelated
     as possible (within 10 iterations)::
     
         >>> lhs(4, samples=5, criterion='correlate', iterations=10)
     
+    A 50-factor design with 1000 samples where no two factors have a
+    correlation coefficient larger than 0.01 in magnitude (unless the
+    iterations run out first)::
+    
+        >>> lhs(50, samples=1000, criterion='corr', tol=0.01)
+    
+    A 2-factor design with 100 samples where the two factors have a rank
+    correlation of about 0.8::
+    
+        >>> lhs(2, samples=100, corrmat=[[1, 0.8], [0.8, 1]])
+    
+    A 10-factor design with 500 samples, keeping the best of 400 candidates
+    generated on 8 processes::
+    
+        >>> lhs(10, samples=500, criterion='m', iterations=400, n_jobs=8)
+    
+    One thousand 3-factor designs with 10 samples each, and the minimum
+    distance between the samples of each design::
+    
+        >>> H, d = lhs(3, samples=10, batch=1000, scores=True)
+        >>> H.shape, d.shape
+        ((1000, 10, 3), (1000,))
+    
+    A 100-factor design with 50000 samples held in 10 MB instead of 40 MB::
+    
+        >>> H = lhs(100, samples=50000, compact=True)
+        >>> H.perm.dtype, H.nbytes
+        (dtype('uint16'), 10000000)
+        >>> H[:2, :3]
+        array([[ 0.46781027,  0.17813614,  0.84263217],
+               [ 0.61573592,  0.36916813,  0.50993115]])
+    
+    A design with 10^9 cells written to a memory-mapped file::
+    
+        >>> H = lhs(1000, samples=1000000, out='design.npy')
+    
     """
-    H = None
+    rng = check_random_state(random_state)
     
     if samples is None:
         samples = n
     
     if criterion is not None:
         assert criterion.lower() in ('center', 'c', 'maximin', 'm', 
-            'centermaximin', 'cm', 'correlation', 
+            'centermaximin', 'cm', 'correlation', 'correlate',
             'corr'), 'Invalid value for "criterion": {}'.format(criterion)
-    else:
-        H = _lhsclassic(n, samples)
-
-    if criterion is None:
-        criterion = 'center'
+        criterion = criterion.lower()
     
     if iterations is None:
         iterations = 5
-        
-    if H is None:
-        if criterion.lower() in ('center', 'c'):
-            H = _lhscentered(n, samples)
-        elif criterion.lower() in ('maximin', 'm'):
-            H = _lhsmaximin(n, samples, iterations, 'maximin')
-        elif criterion.lower() in ('centermaximin', 'cm'):
-            H = _lhsmaximin(n, samples, iterations, 'centermaximin')
-        elif criterion.lower() in ('correlate', 'corr'):
-            H = _lhscorrelate(n, samples, iterations)
+    
+    if method is None:
+        method = 'random'
+    assert method.lower() in ('random', 'ese'), \
+        'Invalid value for "method": {}'.format(method)
+    
+    if method.lower()=='ese':
+        _maximin = _lhsese
+    else:
+        _maximin = _lhsmaximin
+    
+    if n_jobs is None:
+        n_jobs = 1
+    elif n_jobs==-1:
+        n_jobs = os.cpu_count() or 1
+    assert n_jobs>=1, 'Invalid value for "n_jobs": {}'.format(n_jobs)
+    
+    if compact:
+        if batch is not None or out is not None:
+            raise ValueError('"compact" cannot be combined with "batch" or '
+                             '"out"')
+        if criterion in ('maximin', 'm', 'correlation', 'correlate', 'corr'):
+            raise ValueError('"compact" cannot keep the jittered design of the '
+                             '"{}" criterion; use "centermaximin" or a dense '
+                             'design'.format(criterion))
+        H = _lhscompact(criterion, n, samples, iterations, _maximin, tol,
+                        n_jobs, rng)
+        if corrmat is not None:
+            H.perm = _lhsimanconover(H.perm, corrmat)
+        if scores:
+            if criterion in ('correlation', 'correlate', 'corr'):
+                return H, _maxcorr(H.toarray())
+            else:
+                return H, _mindist(H.toarray())
+        return H
+    
+    if out is not None:
+        shape = (samples, n) if batch is None else (batch, samples, n)
+        out = check_out(out, shape)
+        if batch is None and corrmat is None and criterion in (None, 'center', 
+                                                               'c'):
+            out = _lhsfill(out, criterion is None, rng)
+            if scores:
+                return out, _mindist(out)
+            return out
+    
+    if criterion is None:
+        H = _lhsclassic(n, samples, rng, batch)
+    elif criterion in ('center', 'c'):
+        H = _lhscentered(n, samples, rng, batch)
+    elif batch is None:
+        H = _lhsoptimize(criterion, n, samples, iterations, _maximin, tol,
+                         n_jobs, rng)
+    else:
+        # The worker processes are started once for the whole batch
+        H = np.empty((batch, samples, n))
+        with _lhsexecutor(n_jobs) as pool:
+            for k in range(batch):
+                H[k] = _lhsoptimize(criterion, n, samples, iterations, 
+                                    _maximin, tol, n_jobs, rng, pool)
+    
+    if corrmat is not None:
+        if batch is None:
+            H = _lhsimanconover(H, corrmat)
+        else:
+            for k in range(batch):
+                H[k] = _lhsimanconover(H[k], corrmat)
+    
+    if out is not None:
+        out[...] = H
+        H = out
+    
+    if scores:
+        if criterion in ('correlation', 'correlate', 'corr'):
+            return H, _maxcorr(H)
+        else:
+            return H, _mindist(H)
     
     return H
 
 ################################################################################
 
-def _lhsclassic(n, samples):
-    # Generate the intervals
-    cut = np.linspace(0, 1, samples + 1)    
+def _lhscompact(criterion, n, samples, iterations, _maximin, tol, n_jobs, rng):
+    dtype = np.uint16 if samples<=2**16 else np.uint32
+    if criterion in (None, 'center', 'c'):
+        perm = _lhsintervals(n, samples, rng, dtype=dtype)
+    else:
+        # Only centered designs are optimized here, so the intervals of the
+        # optimized design hold all of it
+        H = _lhsoptimize(criterion, n, samples, iterations, _maximin, tol, 
+                         n_jobs, rng)
+        perm = np.floor(H*samples).astype(dtype)
+    
+    if criterion is None:
+        jitter = int(rng.integers(2**63))
+    else:
+        jitter = None
+    
+    return LatinHypercube(perm, jitter)
+
+################################################################################
+
+class LatinHypercube(object):
+    """
+    A latin-hypercube design stored as one permutation per factor
+    
+    Parameters
+    ----------
+    perm : 2d-array
+        A samples-by-n integer array where each column is a permutation of
+        0, 1, ..., samples - 1: the interval that each sample occupies.
+    
+    Optional
+    --------
+    jitter : int
+        The seed of the random positions of the samples within their
+        intervals. If None (Default), the samples are at the interval centers.
+    
+    Notes
+    -----
+    Indexing the design (``H[i]``, ``H[2:5, 0]``, ``H[[1, 3]]``, ...) returns
+    the same floats between zero and one as the full design matrix, but only
+    the requested rows are converted. The jitter is drawn in blocks of rows
+    from the seed, so every access gives the same values. ``np.asarray(H)``
+    or ``H.toarray()`` returns the full design matrix.
+    
+    """
+    _block = 1024  # rows per jitter block
+    
+    def __init__(self, perm, jitter=None):
+        perm = np.asarray(perm)
+        assert perm.ndim==2, 'The permutation array must be 2d.'
+        self.perm = perm
+        self.jitter = jitter
+    
+    @property
+    def shape(self):
+        return self.perm.shape
+    
+    @property
+    def ndim(self):
+        return 2
+    
+    @property
+    def dtype(self):
+        return np.dtype(float)
+    
+    @property
+    def nbytes(self):
+        return self.perm.nbytes
+    
+    def __len__(self):
+        return self.perm.shape[0]
+    
+    def __repr__(self):
+        return 'LatinHypercube(samples={}, n={}, centered={})'.format(
+            self.shape[0], self.shape[1], self.jitter is None)
+    
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        rows = np.arange(len(self))[key[0]]
+        
+        H = self.perm[key[0]].astype(float)
+        if self.jitter is None:
+            H += 0.5
+        else:
+            H += self._jitterrows(rows)
+        H /= len(self)
+        
+        if np.ndim(rows)==0:
+            return H[key[1:]]
+        return H[(slice(None),) + key[1:]]
+    
+    def __array__(self, dtype=None, copy=None):
+        H = self.toarray()
+        return H if dtype is None else H.astype(dtype)
+    
+    def toarray(self):
+        """
+        Convert the design to a samples-by-n float array
+        """
+        return self[:]
+    
+    def _jitterrows(self, rows):
+        rows = np.asarray(rows)
+        flat = rows.ravel()
+        blocks = flat//self._block
+        u = np.empty((flat.size, self.shape[1]))
+        if flat.size==0:
+            return u.reshape(rows.shape + (self.shape[1],))
+        
+        # Group the rows by block once (a no-op sort for slices), so that
+        # every block is drawn and sliced only once
+        order = np.argsort(blocks, kind='stable')
+        sorted_blocks = blocks[order]
+        starts = np.flatnonzero(np.r_[True, 
+                                      sorted_blocks[1:]!=sorted_blocks[:-1]])
+        ends = np.r_[starts[1:], flat.size]
+        for s, e in zip(starts, ends):
+            b = int(sorted_blocks[s])
+            rng = np.random.default_rng(
+                np.random.SeedSequence(self.jitter, spawn_key=(b,)))
+            ub = rng.random((self._block, self.shape[1]))
+            idx = order[s:e]
+            u[idx] = ub[flat[idx] - b*self._block]
+        return u.reshape(rows.shape + (self.shape[1],))
+
+################################################################################
+
+def _lhsoptimize(criterion, n, samples, iterations, _maximin, tol, n_jobs, rng,
+                 pool=None):
+    if criterion in ('maximin', 'm'):
+        return _lhspool(n_jobs, rng, pool, _maximin, n, samples, iterations, 
+                        'maximin')
+    elif criterion in ('centermaximin', 'cm'):
+        return _lhspool(n_jobs, rng, pool, _maximin, n, samples, iterations, 
+                        'centermaximin')
+    else:
+        return _lhspool(n_jobs, rng, pool, _lhscorrelate, n, samples, 
+                        iterations, tol)
+
+################################################################################
+
+def _lhsclassic(n, samples, random_state=None, batch=None):
+    rng = check_random_state(random_state)
+    
+    # Randomly pair the intervals of all the factors at once
+    H = _lhsintervals(n, samples, rng, batch)
     
     # Fill points uniformly in each interval
-    u = np.random.rand(samples, n)
-    a = cut[:samples]
-    b = cut[1:samples + 1]
-    rdpoints = np.zeros_like(u)
-    for j in range(n):
-        rdpoints[:, j] = u[:, j]*(b-a) + a
-    
-    # Make the random pairings
-    H = np.zeros_like(rdpoints)
-    for j in range(n):
-        order = np.random.permutation(range(samples))
-        H[:, j] = rdpoints[order, j]
+    H += rng.random(H.shape)
+    H /= samples
     
     return H
     
 ################################################################################
 
-def _lhscentered(n, samples):
-    # Generate the intervals
-    cut = np.linspace(0, 1, samples + 1)    
+def _lhscentered(n, samples, random_state=None, batch=None):
+    rng = check_random_state(random_state)
     
-    # Fill points uniformly in each interval
-    u = np.random.rand(samples, n)
-    a = cut[:samples]
-    b = cut[1:samples + 1]
-    _center = (a + b)/2
+    # Randomly pair the intervals of all the factors at once
+    H = _lhsintervals(n, samples, rng, batch)
     
-    # Make the random pairings
-    H = np.zeros_like(u)
-    for j in range(n):
-        H[:, j] = np.random.permutation(_center)
+    # Put the points at the centers of the intervals
+    H += 0.5
+    H /= samples
     
     return H
     
 ################################################################################
 
-def _lhsmaximin(n, samples, iterations, lhstype):
+def _lhsfill(out, jittered, rng):
+    """
+    Write an unoptimized design into ``out`` one block of columns at a time
+    """
+    samples, n = out.shape
+    for cols in column_blocks(n, samples):
+        if jittered:
+            out[:, cols] = _lhsclassic(cols.stop - cols.start, samples, rng)
+        else:
+            out[:, cols] = _lhscentered(cols.stop - cols.start, samples, rng)
+    return out
+
+################################################################################
+
+def _lhsintervals(n, samples, rng, batch=None, dtype=float):
+    """
+    A samples-by-n array (or batch of such arrays) where each column holds a
+    random permutation of the interval indices 0, 1, ..., samples - 1
+    """
+    shape = (samples, n) if batch is None else (batch, samples, n)
+    H = np.empty(shape, dtype=dtype)
+    H[...] = np.arange(samples)[:, None]
+    rng.permuted(H, axis=-2, out=H)
+    return H
+    
+################################################################################
+
+def _lhsmaximin(n, samples, iterations, lhstype, random_state=None):
+    rng = check_random_state(random_state)
     maxdist = 0
     
     # Maximize the minimum distance between points
     for i in range(iterations):
         if lhstype=='maximin':
-            Hcandidate = _lhsclassic(n, samples)
+            Hcandidate = _lhsclassic(n, samples, rng)
         else:
-            Hcandidate = _lhscentered(n, samples)
+            Hcandidate = _lhscentered(n, samples, rng)
         
-        d = _pdist(Hcandidate)
-        if maxdist<np.min(d):
-            maxdist = np.min(d)
+        d = _mindist(Hcandidate)
+        if maxdist<d:
+            maxdist = d
             H = Hcandidate.copy()
     
     return H
 
 ################################################################################
 
-def _lhscorrelate(n, samples, iterations):
-    mincorr = np.inf
+def _lhsese(n, samples, iterations, lhstype, random_state=None, p=50):
+    """
+    Maximin latin-hypercube by the enhanced stochastic evolutionary algorithm
+    
+    The design is scored by the phi_p criterion, (sum of d_ij**-p)**(1/p),
+    which for large ``p`` ranks designs like the minimum point distance but
+    changes smoothly. Each trial exchanges two elements of one column, so only
+    the distances of the two rows involved change and the score is updated in
+    O(samples) operations instead of being recomputed. The full matrix of
+    squared point distances is kept in memory.
+    
+    Reference: Jin, R., Chen, W. and Sudjianto, A. (2005), "An efficient
+    algorithm for constructing optimal design of computer experiments",
+    Journal of Statistical Planning and Inference, 134, 268-287.
+    """
+    rng = check_random_state(random_state)
+    if lhstype=='maximin':
+        H = _lhsclassic(n, samples, rng)
+    else:
+        H = _lhscentered(n, samples, rng)
+    
+    m = samples
+    if m<3:
+        return H
+    
+    # Squared point distances, using |a - b|**2 = |a|**2 + |b|**2 - 2*a.b so
+    # that no samples-by-samples-by-n temporary is needed, with an infinite
+    # diagonal so that a point never contributes a distance to itself
+    sq = np.einsum('ij,ij->i', H, H)
+    D2 = np.dot(H, H.T)
+    D2 *= -2
+    D2 += sq[:, None]
+    D2 += sq[None, :]
+    np.maximum(D2, 0, out=D2)
+    D2[np.diag_indices(m)] = np.inf
+    
+    # Distances are scaled by the initial minimum so that d**-p stays finite
+    d2ref = D2.min()
+    
+    def _phi(D2):
+        # Each pair appears twice in the symmetric D2, the diagonal adds 0
+        t = np.divide(d2ref, D2)
+        t **= p/2.
+        return (np.sum(t)/2.)**(1./p)
+    
+    phi = _phi(D2)
+    Hbest = H.copy()
+    phibest = phi
+    
+    # Algorithm parameters: the number of exchanges tried at each step, the
+    # number of steps in each iteration and the initial threshold
+    ne = m*(m - 1)//2
+    J = max(1, min(ne//5, 50))
+    M = max(1, min(2*ne*n//J, 100))
+    T = 0.005*phi
+    
+    rows = np.arange(J)
+    for it in range(iterations):
+        phiold = phibest
+        nacpt = 0
+        nimp = 0
+        
+        for i in range(M):
+            k = i % n
+            x = H[:, k]
+            
+            # Pick J distinct pairs of rows to exchange in column k
+            i1 = rng.integers(m, size=J)
+            i2 = (i1 + rng.integers(1, m, size=J)) % m
+            
+            # Change of the squared distances of rows i1 and i2 to all other
+            # rows (the distance between i1 and i2 itself does not change)
+            delta = (x[i2, None] - x[None, :])**2 - (x[i1, None] - x[None, :])**2
+            delta[rows, i1] = 0
+            delta[rows, i2] = 0
+            d1, d2 = D2[i1], D2[i2]
+            dS = (np.sum((d2ref/(d1 + delta))**(p/2.) - (d2ref/d1)**(p/2.), axis=1) + 
+                  np.sum((d2ref/(d2 - delta))**(p/2.) - (d2ref/d2)**(p/2.), axis=1))
+            
+            # Keep the best of the J exchanges if it passes the threshold
+            jbest = np.argmin(dS)
+            phitry = max(phi**p + dS[jbest], 0)**(1./p)
+            if phitry - phi<=T*rng.random():
+                a, b = i1[jbest], i2[jbest]
+                x[a], x[b] = x[b], x[a]
+                D2[a] += delta[jbest]
+                D2[b] -= delta[jbest]
+                D2[:, a] = D2[a]
+                D2[:, b] = D2[b]
+                phi = phitry
+                nacpt += 1
+                if phi<phibest:
+                    Hbest = H.copy()
+                    phibest = phi
+                    nimp += 1
+        
+        # Refresh the score to keep rounding errors from accumulating
+        phi = _phi(D2)
+        
+        # Update the threshold: lower it while the search is improving the
+        # best design, raise it to explore when it is stuck
+        ratio = nacpt/float(M)
+        if phibest<phiold:
+            if ratio>0.1 and nimp<nacpt:
+                T *= 0.8
+            elif ratio<=0.1:
+                T /= 0.8
+        else:
+            if ratio<0.1:
+                T /= 0.7
+            elif ratio>0.8:
+                T *= 0.9
     
-    # Minimize the components correlation coefficients
-    for i in range(iterations):
-        # Generate a random LHS
-        Hcandidate = _lhsclassic(n, samples)
-        R = np.corrcoef(Hcandidate)
-        if np.max(np.abs(R[R!=1]))<mincorr:
-            mincorr = np.max(np.abs(R-np.eye(R.shape[0])))
-            print('new candidate solution found with max,abs corrcoef = {}'.format(mincorr))
-            H = Hcandidate.copy()
+    return Hbest
+
+################################################################################
+
+def _lhscorrelate(n, samples, iterations, tol=None, random_state=None):
+    """
+    Latin-hypercube with minimal correlation between the factors
+    
+    Starting from a random design, pairs of elements are exchanged within the
+    column of the worst-correlated pair of factors, keeping an exchange when it
+    lowers the sum of squared correlations of that factor. Since an exchange
+    does not change the mean or spread of a column, it changes only one row
+    (and column) of the correlation matrix, by a multiple of the difference of
+    the two exchanged rows, so each trial exchange is scored in O(n)
+    operations instead of recomputing the correlations in O(samples*n**2).
+    Finding the worst-correlated pair still costs O(n**2) per step. Each of
+    the ``iterations`` rounds takes up to ``20*n`` steps, independently of
+    the number of samples, after which the correlation matrix is recomputed
+    to keep rounding errors from accumulating. The search stops as soon as
+    no correlation is larger than ``tol`` in magnitude.
+    """
+    rng = check_random_state(random_state)
+    if tol is None:
+        tol = 1./samples
+    
+    H = _lhsclassic(n, samples, rng)
+    m = samples
+    if m<3 or n<2:
+        return H
+    
+    # With unit-length, centered columns the correlation matrix is Z'Z
+    Z = H - H.mean(axis=0)
+    Z /= np.sqrt(np.sum(Z**2, axis=0))
+    R = np.dot(Z.T, Z)
+    
+    J = min(m, 20)  # exchanges tried at each step
+    rows = np.arange(J)
+    offdiag = ~np.eye(n, dtype=bool)
+    for it in range(iterations):
+        for i in range(20*n):
+            # Work on the worst-correlated pair of factors
+            Rabs = np.abs(R)
+            Rabs[~offdiag] = 0
+            k, l = np.unravel_index(np.argmax(Rabs), Rabs.shape)
+            if Rabs[k, l]<=tol:
+                return H
+            if rng.random()<0.5:
+                k = l
+            
+            # Pick J distinct pairs of rows to exchange in column k
+            i1 = rng.integers(m, size=J)
+            i2 = (i1 + rng.integers(1, m, size=J)) % m
+            
+            # The rank-one change of row k of R for each exchange
+            dR = (Z[i2, k] - Z[i1, k])[:, None]*(Z[i1] - Z[i2])
+            dR[rows, k] = 0
+            
+            score = np.sum((R[k] + dR)**2, axis=1)
+            j = np.argmin(score)
+            if score[j]<np.sum(R[k]**2):
+                a, b = i1[j], i2[j]
+                for A in (H, Z):
+                    A[a, k], A[b, k] = A[b, k], A[a, k]
+                R[k] += dR[j]
+                R[:, k] = R[k]
+        
+        # Refresh the correlations to keep rounding errors from accumulating
+        R = np.dot(Z.T, Z)
     
     return H
     
 ################################################################################
 
+def _lhsexecutor(n_jobs):
+    """
+    A process pool for ``n_jobs`` workers, or a placeholder context for one
+    """
+    if n_jobs==1:
+        return nullcontext()
+    return ProcessPoolExecutor(n_jobs)
+
+def _lhspool(n_jobs, rng, pool, func, n, samples, iterations, *args):
+    """
+    Run an optimizing criterion on ``n_jobs`` processes and keep the best
+    design.
+    
+    The random-restart maximin search shares its iterations among the
+    workers, the other optimizers are restarted independently on each
+    worker. Every worker draws from its own generator spawned from ``rng``,
+    so the random streams are statistically independent and reproducible.
+    The workers of ``pool`` are used if it is given, otherwise a pool is
+    started for this design only.
+    """
+    if n_jobs==1:
+        return func(n, samples, iterations, *args, random_state=rng)
+    
+    if func is _lhsmaximin:
+        jobs = [iterations//n_jobs + (i<iterations % n_jobs) 
+                for i in range(n_jobs)]
+        jobs = [it for it in jobs if it>0]
+    else:
+        jobs = [iterations]*n_jobs
+    
+    rngs = spawn_random_states(rng, len(jobs))
+    
+    with (nullcontext(pool) if pool is not None else 
+          ProcessPoolExecutor(len(jobs))) as pool:
+        futures = [pool.submit(_lhsworker, worker_rng, func, n, samples, it, 
+                               *args) for worker_rng, it in zip(rngs, jobs)]
+        designs = [f.result() for f in futures]
+    
+    if func is _lhscorrelate:
+        return min(designs, key=_maxcorr)
+    else:
+        return max(designs, key=_mindist)
+
+def _lhsworker(rng, func, *args):
+    return func(*args, random_state=rng)
+
+################################################################################
+
+def _maxcorr(H):
+    """
+    The largest absolute correlation coefficient between two factors of ``H``
+    (or of each design in a batch of designs)
+    """
+    Z = H - H.mean(axis=-2, keepdims=True)
+    Z /= np.sqrt(np.sum(Z**2, axis=-2, keepdims=True))
+    R = np.abs(np.matmul(np.swapaxes(Z, -1, -2), Z))
+    R[..., np.arange(H.shape[-1]), np.arange(H.shape[-1])] = 0
+    return R.max(axis=(-2, -1))
+
+################################################################################
+
+def _lhsimanconover(H, corrmat):
+    """
+    Re-pair the samples of a design to induce a rank correlation structure
+    
+    Reference: Iman, R. L. and Conover, W. J. (1982), "A distribution-free
+    approach to inducing rank correlation among input variables",
+    Communications in Statistics - Simulation and Computation, 11, 311-334.
+    """
+    m, n = H.shape
+    C = np.asarray(corrmat, dtype=float)
+    if C.shape!=(n, n):
+        raise ValueError('"corrmat" must be a {0}-by-{0} matrix'.format(n))
+    if not (np.allclose(C, C.T) and np.allclose(np.diag(C), 1)):
+        raise ValueError('"corrmat" must be symmetric with a unit diagonal')
+    if m<=n:
+        raise ValueError('The number of samples must be greater than the number '
+                         'of factors to induce a correlation structure')
+    
+    # Van der Waerden scores, paired in the same (random) order as the design
+    ranks = np.argsort(np.argsort(H, axis=0), axis=0)
+    S = ndtri(np.arange(1, m + 1)/(m + 1.))[ranks]
+    
+    # Transform the scores so their correlation matrix becomes C: with
+    # corr(S) = Q*Q' and C = P*P', the scores S*inv(Q)'*P' have correlation C
+    try:
+        Q = cholesky(np.corrcoef(S, rowvar=False), lower=True)
+        P = cholesky(C, lower=True)
+    except np.linalg.LinAlgError:
+        raise ValueError('"corrmat" must be positive definite')
+    T = np.dot(S, solve_triangular(Q, P.T, lower=True, trans='T'))
+    
+    # Give each factor the rank order of the transformed scores
+    order = np.argsort(np.argsort(T, axis=0), axis=0)
+    return np.take_along_axis(np.sort(H, axis=0), order, axis=0)
+
+################################################################################
+
 def _pdist(x):
     """
     Calculate the pair-wise point distances of a matrix
@@ -235,10 +831,78 @@ def _pdist(x):
     if m<2:
         return []
     
-    d = []
-    for i in range(m - 1):
-        for j in range(i + 1, m):
-            d.append((sum((x[j, :] - x[i, :])**2))**0.5)
+    d = np.empty(m*(m - 1)//2)
+    for i, dblock in _pdistblocks(x):
+        d[i*m - i*(i + 1)//2:][:dblock.size] = dblock
     
-    return np.array(d)
+    return d
 
+################################################################################
+
+def _mindist(x, blocksize=None):
+    """
+    Calculate the minimum pair-wise point distance of a matrix
+    
+    Parameters
+    ----------
+    x : 2d-array
+        An m-by-n array of scalars, where there are m points in n dimensions,
+        or a k-by-m-by-n array of k such point sets.
+    
+    Optional
+    --------
+    blocksize : int
+        The number of rows processed at once (Default: chosen so that no more
+        than about 2**20 distances are held in memory at any time).
+    
+    Returns
+    -------
+    d : scalar or 1d-array
+        The smallest distance between any two points of ``x`` (``inf`` if
+        there are fewer than two points), for each point set.
+    
+    """
+    x = np.atleast_2d(x)
+    if x.ndim==3:
+        return np.array([_mindist(xk, blocksize) for xk in x])
+    assert len(x.shape)==2, 'Input array must be 2d-dimensional'
+    
+    d2 = np.inf
+    for i, dblock in _pdistblocks(x, blocksize, squared=True):
+        d2 = min(d2, dblock.min())
+    
+    return d2**0.5
+
+################################################################################
+
+def _pdistblocks(x, blocksize=None, squared=False):
+    """
+    Iterate over the condensed pair-wise distances of ``x`` in row blocks.
+    
+    Each iteration yields ``(i, d)`` where ``d`` holds the distances (i, j)
+    for j > i, for all rows i of the current block, in the same order as
+    ``_pdist``, and ``i`` is the first row of the block. Only one block of
+    distances is held in memory at a time.
+    """
+    x = np.asarray(x, dtype=float)
+    m = x.shape[0]
+    if blocksize is None:
+        blocksize = max(1, 2**20//max(m, 1))
+    
+    sq = np.einsum('ij,ij->i', x, x)
+    for i0 in range(0, m - 1, blocksize):
+        i1 = min(i0 + blocksize, m - 1)
+        
+        # Squared distances between the block rows and all subsequent rows,
+        # using |a - b|**2 = |a|**2 + |b|**2 - 2*a.b
+        d2 = np.dot(x[i0:i1], x[i0 + 1:].T)
+        d2 *= -2
+        d2 += sq[i0:i1, None]
+        d2 += sq[None, i0 + 1:]
+        np.maximum(d2, 0, out=d2)
+        
+        # Keep only the upper triangle (j > i) of the block, row by row
+        mask = np.arange(i0 + 1, m)[None, :]>np.arange(i0, i1)[:, None]
+        d2 = d2[mask]
+        
+        yield i0, (d2 if squared else np.sqrt(d2, out=d2))
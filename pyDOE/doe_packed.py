@@ -0,0 +1,171 @@
+"""
+Bit-packed storage of 2-level designs.
+
+A 2-level design with levels -1 and 1 holds one bit of information per cell.
+``PackedDesign`` stores each column as a sequence of 64-bit words, the bit of
+row r being bit r % 64 of word r // 64, set where the level is -1. With this
+coding the product of two columns is the exclusive-or of their words, so the
+interaction columns of a fractional factorial design are built 64 rows at a
+time.
+"""
+
+import numpy as np
+
+__all__ = ['PackedDesign']
+
+_ONES = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+# The word of factor j < 6 of a full-factorial design: row r has level -1
+# where bit j of r is 0, which is the same pattern in every word
+_PATTERNS = [np.uint64(sum(1 << r for r in range(64) if not (r >> j) & 1))
+             for j in range(6)]
+
+class PackedDesign(object):
+    """
+    A 2-level design stored with one bit per cell
+
+    Parameters
+    ----------
+    words : 2d-array
+        An n-by-w array of uint64 words, where n is the number of columns and
+        w = ceil(m/64) for m rows. Bit r % 64 of word r // 64 is set if row
+        r has the level -1.
+    m : int
+        The number of rows of the design.
+
+    Notes
+    -----
+    ``ff2n``, ``fracfact`` and ``pbdesign`` return a ``PackedDesign`` when
+    called with ``packed=True``. Use ``unpack`` (or ``np.asarray``) to get the
+    usual -1/1 design matrix, and ``PackedDesign.from_array`` to pack one.
+
+    Example
+    -------
+    ::
+
+        >>> H = fracfact('a b c abc', packed=True)
+        >>> H.shape, H.nbytes
+        ((8, 4), 32)
+        >>> H.unpack()
+        array([[-1., -1., -1., -1.],
+               [ 1., -1., -1.,  1.],
+               [-1.,  1., -1.,  1.],
+               [ 1.,  1., -1., -1.],
+               [-1., -1.,  1.,  1.],
+               [ 1., -1.,  1., -1.],
+               [-1.,  1.,  1., -1.],
+               [ 1.,  1.,  1.,  1.]])
+
+    """
+    def __init__(self, words, m):
+        words = np.ascontiguousarray(words, dtype=np.uint64)
+        assert words.ndim==2, 'The packed words must be a 2d-array.'
+        assert words.shape[1]==_nwords(m), \
+            'Expected {} words per column for {} rows'.format(_nwords(m), m)
+        self.words = words
+        self.m = int(m)
+
+    @classmethod
+    def from_array(cls, H):
+        """
+        Pack a 2-level design matrix with levels -1 and 1
+        """
+        H = np.asarray(H)
+        assert H.ndim==2, 'Input design matrix must be 2d.'
+        m, n = H.shape
+        assert np.all(np.abs(H)==1), 'Input design matrix must have levels -1 and 1.'
+
+        bits = np.packbits(H.T<0, axis=1, bitorder='little')
+        buf = np.zeros((n, 8*_nwords(m)), dtype=np.uint8)
+        buf[:, :bits.shape[1]] = bits
+        return cls(buf.view('<u8').astype(np.uint64), m)
+
+    @property
+    def shape(self):
+        return (self.m, self.words.shape[0])
+
+    @property
+    def ndim(self):
+        return 2
+
+    @property
+    def nbytes(self):
+        return self.words.nbytes
+
+    def __len__(self):
+        return self.m
+
+    def __repr__(self):
+        return 'PackedDesign(m={}, n={})'.format(*self.shape)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.unpack(float if dtype is None else dtype)
+
+    def unpack(self, dtype=float):
+        """
+        The m-by-n design matrix with levels -1 and 1
+        """
+        bits = np.unpackbits(self.words.astype('<u8').view(np.uint8), axis=1,
+                             count=self.m, bitorder='little')
+        bits = bits.T.view(np.int8)
+        bits *= -2
+        bits += 1
+        return bits.astype(dtype)
+
+    def product(self, columns, negate=False):
+        """
+        The packed words of the product of the given columns
+
+        Parameters
+        ----------
+        columns : array-like
+            The indices of the columns to multiply.
+
+        Optional
+        --------
+        negate : bool
+            If True, return the opposite of the product (Default: False).
+
+        Returns
+        -------
+        words : 1d-array
+            The uint64 words of the product column.
+
+        """
+        words = np.bitwise_xor.reduce(self.words[list(columns)], axis=0)
+        if negate:
+            words = _negate(words, self.m)
+        return words
+
+def _nwords(m):
+    return (int(m) + 63)//64
+
+def _tailmask(m):
+    """
+    The mask of the bits of the last word that belong to rows of the design
+    """
+    r = int(m) % 64
+    return _ONES if r==0 else np.uint64((1 << r) - 1)
+
+def _negate(words, m):
+    words = ~words
+    words[-1] &= _tailmask(m)
+    return words
+
+def _packed_ff2n(n):
+    """
+    The 2-level full-factorial design ``ff2n(n)`` in packed form
+    """
+    m = 2**n
+    w = np.arange(_nwords(m), dtype=np.uint64)
+    words = np.empty((n, w.size), dtype=np.uint64)
+    for j in range(n):
+        if j<6:
+            words[j] = _PATTERNS[j]
+        else:
+            # Whole words alternate between all -1 and all 1 in runs of
+            # 2**(j - 6) words
+            words[j] = np.where((w >> np.uint64(j - 6)) & np.uint64(1),
+                                np.uint64(0), _ONES)
+    words[:, -1] &= _tailmask(m)
+    return PackedDesign(words, m)
@@ -13,13 +13,13 @@ Much thanks goes to these individuals. It has been converted to Python by
 Abraham Lee.
 """
 
-import math
-import numpy as np
-from scipy.linalg import toeplitz, hankel
+from pyDOE.doe_factorial import _coded_dtype
+from pyDOE.doe_hadamard import _hadamard
+from pyDOE.doe_packed import PackedDesign
 
 __all__ = ['pbdesign']
 
-def pbdesign(n):
+def pbdesign(n, packed=False, dtype=float):
     """
     Generate a Plackett-Burman design
     
@@ -28,6 +28,16 @@ def pbdesign(n):
     n : int
         The number of factors to create a matrix for.
     
+    Optional
+    --------
+    packed : bool
+        If True, return a ``PackedDesign`` that stores one bit per cell
+        (Default: False).
+    dtype : dtype
+        The data type of the design matrix (Default: float). The -1/1 levels
+        fit any signed type, e.g. ``np.int8`` for one byte per cell; other
+        types raise a ValueError.
+    
     Returns
     -------
     H : 2d-array
@@ -36,6 +46,12 @@ def pbdesign(n):
         for 1-3 factors there are 4 rows, for 4-7 factors there are 8 rows,
         etc.)
     
+    Notes
+    -----
+    The design is made of columns of a Hadamard matrix (see ``hadamard``).
+    If no Hadamard matrix of that order can be constructed (the first such
+    order is 116), the next multiple of 4 that has one is used.
+    
     Example
     -------
     
@@ -61,36 +77,18 @@ def pbdesign(n):
        
     """
     assert n>0, 'Number of factors must be a positive integer'
+    dtype = _coded_dtype(dtype)
     keep = int(n)
     n = 4*(int(n/4) + 1)  # calculate the correct number of rows (multiple of 4)
-    f, e = np.frexp([n, n/12., n/20.])
-    k = [idx for idx, val in enumerate(np.logical_and(f==0.5, e>0)) if val]
-    
-    assert isinstance(n, int) and k!=[], 'Invalid inputs. n must be a multiple of 4.'
-    
-    k = k[0]
-    e = e[k] - 1
-    
-    if k==0:  # N = 1*2**e
-        H = np.ones((1, 1))
-    elif k==1:  # N = 12*2**e
-        H = np.vstack((np.ones((1, 12)), np.hstack((np.ones((11, 1)), 
-            toeplitz([-1, -1, 1, -1, -1, -1, 1, 1, 1, -1, 1],
-                     [-1, 1, -1, 1, 1, 1, -1, -1, -1, 1, -1])))))
-    elif k==2:  # N = 20*2**e
-        H = np.vstack((np.ones((1, 20)), np.hstack((np.ones((19, 1)),
-            hankel(
-            [-1, -1, 1, 1, -1, -1, -1, -1, 1, -1, 1, -1, 1, 1, 1, 1, -1, -1, 1],
-            [1, -1, -1, 1, 1, -1, -1, -1, -1, 1, -1, 1, -1, 1, 1, 1, 1, -1, -1])
-            ))))
-    
-    # Kronecker product construction
-    for i in range(e):
-        H = np.vstack((np.hstack((H, H)), np.hstack((H, -H))))
+    H = _hadamard(n)
+    while H is None:
+        n += 4
+        H = _hadamard(n)
     
-    # Reduce the size of the matrix as needed
-    H = H[:, 1:(keep + 1)]
+    # Reduce the size of the matrix as needed, reading the int8 matrix
+    # upside down, and convert it in a single copy
+    H = H[::-1, 1:(keep + 1)]
     
-    return np.flipud(H)
+    return PackedDesign.from_array(H) if packed else H.astype(dtype)
     
     
@@ -14,8 +14,9 @@ Abraham Lee.
 """
 
 import numpy as np
+import scipy.sparse as sps
 
-def repeat_center(n, repeat):
+def repeat_center(n, repeat, sparse=False):
     """
     Create the center-point portion of a design matrix
     
@@ -26,9 +27,15 @@ def repeat_center(n, repeat):
     repeat : int
         The number of center points to repeat
     
+    Optional
+    --------
+    sparse : bool or str
+        If True, return an empty ``scipy.sparse`` CSR matrix, or a sparse
+        matrix of the given format, e.g. 'coo' (Default: False).
+    
     Returns
     -------
-    mat : 2d-array
+    mat : 2d-array or sparse matrix
         The center-point portion of a design matrix (elements all zero).
     
     Example
@@ -40,4 +47,7 @@ def repeat_center(n, repeat):
                [ 0.,  0.,  0.]])
        
     """
+    if sparse:
+        return sps.csr_matrix((repeat, n)).asformat(
+            'csr' if sparse is True else sparse)
     return np.zeros((repeat, n))
@@ -14,8 +14,9 @@ Abraham Lee.
 """
 
 import numpy as np
+import scipy.sparse as sps
 
-def star(n, alpha='faced', center=(1, 1)):
+def star(n, alpha='faced', center=(1, 1), sparse=False):
     """
     Create the star points of various design matrices
     
@@ -32,10 +33,14 @@ def star(n, alpha='faced', center=(1, 1)):
         A 1-by-2 array of integers indicating the number of center points
         assigned in each block of the response surface design. Default is 
         (1, 1).
+    sparse : bool or str
+        If True, return ``H`` as a ``scipy.sparse`` CSR matrix, which stores
+        only the 2*n star points. A format name such as 'coo' or 'csc' gives
+        a sparse matrix of that format instead (Default: False).
     
     Returns
     -------
-    H : 2d-array
+    H : 2d-array or sparse matrix
         The star-point portion of the design matrix (i.e. at +/- alpha)
     a : scalar
         The alpha value to scale the star points with.
@@ -69,11 +74,16 @@ def star(n, alpha='faced', center=(1, 1)):
     else:
         raise ValueError('Invalid value for "alpha": {:}'.format(alpha))
     
+    # Row 2*i has -alpha in column i, row 2*i + 1 has +alpha
+    data = np.tile([-float(a), a], n)
+    cols = np.repeat(np.arange(n), 2)
+    
+    if sparse:
+        H = sps.csr_matrix((data, cols, np.arange(2*n + 1)), shape=(2*n, n))
+        return H.asformat('csr' if sparse is True else sparse), a
+    
     # Create the actual matrix now.
     H = np.zeros((2*n, n))
-    for i in range(n):
-        H[2*i:2*i+2, i] = [-1, 1]
-    
-    H *= a
+    H[np.arange(2*n), cols] = data
     
     return H, a
@@ -0,0 +1,53 @@
+"""
+Output arrays for large designs.
+
+Functions that accept an ``out`` argument write the design into it instead
+of allocating a new array. ``out`` can be any of:
+
+- an array of the right shape, e.g. a ``numpy.memmap``,
+- a file name: a ``.npy`` file of the right shape is created and memory
+  mapped, so that the design can be bigger than the available memory.
+"""
+
+import numpy as np
+
+def check_out(out, shape, dtype=float):
+    """
+    Turn ``out`` into an array to write a design into
+
+    Parameters
+    ----------
+    out : array or str
+        The array, or the name of the ``.npy`` file to create.
+    shape : tuple
+        The shape of the design.
+
+    Optional
+    --------
+    dtype : dtype
+        The data type of a newly created file (Default: float).
+
+    Returns
+    -------
+    out : array
+        The array (or ``numpy.memmap``) to write the design into. Files are
+        created in Fortran (column-major) order so that the columns of the
+        design, which are generated one block at a time, are contiguous on
+        disk.
+
+    """
+    if isinstance(out, str):
+        return np.lib.format.open_memmap(out, mode='w+', dtype=dtype,
+                                         shape=shape, fortran_order=True)
+
+    if out.shape!=tuple(shape):
+        raise ValueError('"out" has shape {}, but the design has shape {}'
+                         .format(out.shape, tuple(shape)))
+    return out
+
+def column_blocks(n, rows, size=2**22):
+    """
+    Split the ``n`` columns of a design into slices of about ``size`` cells
+    """
+    step = max(1, size//max(rows, 1))
+    return [slice(j, min(j + step, n)) for j in range(0, n, step)]
@@ -0,0 +1,82 @@
+"""
+Random number generation for the stochastic designs of pyDOE.
+
+Every function that draws random numbers accepts a ``random_state`` argument,
+which can be any of:
+
+- ``None``: draw a new generator from NumPy's global random state, so that
+  ``np.random.seed`` still makes the results reproducible,
+- an int (or sequence of ints) or a ``numpy.random.SeedSequence``: seed a new
+  generator with it,
+- a ``numpy.random.Generator``: use it directly.
+
+To generate designs in parallel threads or processes, give each worker its own
+generator from ``spawn_random_states``.
+"""
+
+import numpy as np
+
+__all__ = ['spawn_random_states']
+
+def check_random_state(random_state=None):
+    """
+    Turn ``random_state`` into a ``numpy.random.Generator``
+
+    Parameters
+    ----------
+    random_state : None, int, array-like, SeedSequence or Generator
+        The seed or generator to use (see the module documentation).
+
+    Returns
+    -------
+    rng : Generator
+        A random number generator.
+
+    """
+    if isinstance(random_state, np.random.Generator):
+        return random_state
+    return np.random.default_rng(_seedsequence(random_state))
+
+def spawn_random_states(random_state, n):
+    """
+    Create statistically independent random number generators
+
+    Parameters
+    ----------
+    random_state : None, int, array-like, SeedSequence or Generator
+        The parent seed or generator.
+    n : int
+        The number of generators to create.
+
+    Returns
+    -------
+    rngs : list
+        A list of ``n`` independent ``numpy.random.Generator`` objects. The
+        same parent seed always gives the same list, so designs generated in
+        parallel from it are reproducible.
+
+    Example
+    -------
+    Generate four designs reproducibly on a thread pool::
+
+        >>> from concurrent.futures import ThreadPoolExecutor
+        >>> rngs = spawn_random_states(12345, 4)
+        >>> with ThreadPoolExecutor(4) as pool:
+        ...     designs = list(pool.map(lambda rng: lhs(3, 10, random_state=rng), rngs))
+
+    """
+    if isinstance(random_state, np.random.Generator):
+        seed = random_state.bit_generator.seed_seq
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = _seedsequence(random_state.integers(2**32, size=4))
+        children = seed.spawn(n)
+    else:
+        children = _seedsequence(random_state).spawn(n)
+    return [np.random.default_rng(child) for child in children]
+
+def _seedsequence(random_state):
+    if isinstance(random_state, np.random.SeedSequence):
+        return random_state
+    if random_state is None:
+        random_state = np.random.randint(2**31, size=4)
+    return np.random.SeedSequence(random_state)
@@ -14,6 +14,11 @@ Abraham Lee.
 """
 
 import numpy as np
+from scipy.linalg import qr, solve_triangular
+from pyDOE.build_regression_matrix import (compile_model, RegressionModel,
+    _MODELS)
+
+__all__ = ['var_regression_matrix', 'PredictionVariance']
 
 def var_regression_matrix(H, x, model, sigma=1):
     """
@@ -24,7 +29,8 @@ def var_regression_matrix(H, x, model, sigma=1):
     H : 2d-array
         The regression matrix
     x : 2d-array
-        The coordinates to calculate the regression error variance at.
+        The coordinates to calculate the regression error variance at: a
+        single point (a row or a column), or one point per row.
     model : str
         A string of tokens that define the regression model (e.g. 
         '1 x1 x2 x1*x2')
@@ -34,18 +40,117 @@ def var_regression_matrix(H, x, model, sigma=1):
     Returns
     -------
     var : scalar
-        The variance of the regression error, evaluated at ``x``.
+        The variance of the regression error, evaluated at ``x`` (a 1-by-1
+        array for a single point, or one value per point).
+    
+    Notes
+    -----
+    To evaluate the variance many times with the same regression matrix,
+    use a ``PredictionVariance`` object, which factorizes it only once.
         
     """
     x = np.atleast_2d(x)
-    H = np.atleast_2d(H)
     
     if x.shape[0]==1:
         x = x.T
     
-    if np.rank(H)<(np.dot(H.T, H)).shape[0]:
-        raise ValueError("model and DOE don't suit together")
+    if x.shape[1]==1:
+        # A single point, given by the rows of x
+        return PredictionVariance(H, model, sigma)(x.T).reshape(1, 1)
+    return PredictionVariance(H, model, sigma)(x)
+
+################################################################################
+
+class PredictionVariance(object):
+    """
+    The variance of the predictions of a regression model
+    
+    Parameters
+    ----------
+    H : 2d-array
+        The regression matrix of the design.
+    model : str
+        A string of tokens that define the regression model (e.g. 
+        '1 x1 x2 x1*x2'), or any model accepted by ``compile_model``.
+    
+    Optional
+    --------
+    sigma : scalar
+        An estimate of the variance (default: 1).
+    
+    Notes
+    -----
+    The variance at a point x is sigma^2*f(x)'(H'H)^-1 f(x), where f(x) is
+    the row of the regression matrix at x. With the QR factorization
+    H = QR, computed once when the object is created, it is
+    sigma^2*|R'^-1 f(x)|^2, which is evaluated for blocks of points with a
+    triangular solve instead of inverting H'H.
+    
+    Example
+    -------
+    ::
+    
+        >>> H = build_regression_matrix(ff2n(2), '1 x0 x1 x0*x1')
+        >>> V = PredictionVariance(H, '1 x0 x1 x0*x1')
+        >>> V([[0, 0], [1, 1], [0.5, -0.5]])
+        array([0.25    , 1.      , 0.390625])
+    
+    """
+    def __init__(self, H, model, sigma=1):
+        H = np.atleast_2d(H)
+        
+        if np.linalg.matrix_rank(H)<H.shape[1]:
+            raise ValueError("model and DOE don't suit together")
+        
+        self.R = qr(H, mode='r')[0][:H.shape[1]]
+        
+        # Named models depend on the number of variables of the points, so
+        # only they are compiled when called
+        if not (isinstance(model, str) and model in _MODELS):
+            model = compile_model(model)
+            self._check(model)
+        self.model = model
+        self.sigma = sigma
+    
+    def __call__(self, x, blocksize=2**16):
+        """
+        The prediction variance at points x
+        
+        Parameters
+        ----------
+        x : 2d-array
+            The points, one per row (or a single point as a 1d-array).
+        
+        Optional
+        --------
+        blocksize : int
+            The number of points evaluated at once (Default: 65536).
+        
+        Returns
+        -------
+        var : 1d-array
+            The variance at every point (a scalar for a single 1d point).
+        
+        """
+        x = np.asarray(x, dtype=float)
+        if x.ndim==1:
+            return self(x[None, :], blocksize)[0]
+        assert x.ndim==2, 'The points must be a 2d-array.'
+        
+        model = self.model
+        if not isinstance(model, RegressionModel):
+            model = compile_model(model, n=x.shape[1])
+            self._check(model)
+        
+        var = np.empty(x.shape[0])
+        for i in range(0, x.shape[0], blocksize):
+            F = model.build(x[i:i + blocksize])
+            Z = solve_triangular(self.R, F.T, trans='T', check_finite=False)
+            np.einsum('ij,ij->j', Z, Z, out=var[i:i + blocksize])
+        var *= self.sigma**2
+        return var
     
-    x_mod = build_regression_matrix(x, model)
-    var = sigma**2*np.dot(np.dot(x_mod.T, np.linalg.inv(np.dot(H.T, H))), x_mod)
-    return var
+    def _check(self, model):
+        if len(model)!=self.R.shape[1]:
+            raise ValueError('The model has {} terms, but the regression matrix '
+                             'has {} columns'.format(len(model), self.R.shape[1]))